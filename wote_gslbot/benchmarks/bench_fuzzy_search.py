@@ -0,0 +1,117 @@
+"""
+Benchmark: fuzzy sign lookup, difflib scan vs. the delete index
+
+Builds a synthetic dictionary of N words, then times the old
+VideoDatabase.fuzzy_search (difflib over every word) against
+search_index.FuzzyIndex on misspelt queries, and inline autocomplete
+(search_index.PrefixIndex) on 1-3 character prefixes.
+
+Usage: python benchmarks/bench_fuzzy_search.py [--words 100000] [--queries 200]
+"""
+import os
+import sys
+import time
+import random
+import string
+import difflib
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark')
+
+from search_index import FuzzyIndex, PrefixIndex
+
+
+def make_dictionary(count: int, rng: random.Random) -> dict:
+    words = {}
+    while len(words) < count:
+        word = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 10)))
+        words[word] = {'path': f'data/videos/words/{word}.mp4', 'category': 'words'}
+    return {'alphabets': {}, 'numbers': {}, 'words': words}
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    """One random typo: deletion, insertion, substitution or transposition"""
+    i = rng.randrange(len(word))
+    edit = rng.choice(('delete', 'insert', 'substitute', 'transpose'))
+    if edit == 'delete' and len(word) > 1:
+        return word[:i] + word[i + 1:]
+    if edit == 'insert':
+        return word[:i] + rng.choice(string.ascii_uppercase) + word[i:]
+    if edit == 'transpose' and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice(string.ascii_uppercase) + word[i + 1:]
+
+
+def difflib_search(dictionary: dict, query: str, max_results: int = 5) -> list:
+    """The previous VideoDatabase.fuzzy_search"""
+    all_words = []
+    for category, items in dictionary.items():
+        for word, info in items.items():
+            all_words.append({'word': word, 'info': info, 'category': category})
+
+    words_only = [item['word'] for item in all_words]
+    matches = difflib.get_close_matches(query, words_only, n=max_results, cutoff=0.4)
+
+    results = []
+    for match in matches:
+        for item in all_words:
+            if item['word'] == match:
+                results.append(item)
+                break
+    return results
+
+
+def time_queries(search, queries: list) -> list:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--difflib-queries', type=int, default=5,
+                        help='difflib is slow on large dictionaries; time only this many queries')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    dictionary = make_dictionary(args.words, rng)
+    targets = rng.sample(sorted(dictionary['words']), args.queries)
+    queries = [misspell(word, rng) for word in targets]
+
+    started = time.perf_counter()
+    index = FuzzyIndex()
+    index.build(dictionary)
+    build_time = time.perf_counter() - started
+
+    prefixes = PrefixIndex(index.entries)
+    prefix_queries = [target[:rng.randint(1, 3)] for target in targets]
+
+    index_times = time_queries(index.suggest, queries)
+    prefix_times = time_queries(lambda prefix: prefixes.complete(prefix, 20), prefix_queries)
+    found = sum(
+        any(item['word'] == target for item in index.suggest(query))
+        for query, target in zip(queries, targets)
+    )
+    difflib_times = time_queries(lambda query: difflib_search(dictionary, query), queries[:args.difflib_queries])
+
+    print(f"📊 {args.words} words, {args.queries} misspelt queries\n")
+    print(f"Index build: {build_time:.2f} s")
+    print(f"Intended word in top 5: {found}/{args.queries}\n")
+    print(f"{'Engine':<10} {'Queries':>8} {'Mean (ms)':>11} {'p99 (ms)':>10}")
+    print("-" * 42)
+    for name, timings in (('difflib', difflib_times), ('index', index_times), ('prefix', prefix_times)):
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{name:<10} {len(timings):>8} {statistics.mean(timings) * 1000:>11.3f} {p99 * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: leaderboard updates, full re-sort vs. the incremental ranking
+
+Creates N synthetic users, then times one stats update followed by reading
+the top 10 the old way (sort every user, keep the top 50, as the previous
+GameDatabase._update_leaderboard did) and with leaderboard.Leaderboard.
+
+Usage: python benchmarks/bench_leaderboard.py [--users 1000000] [--updates 10000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark')
+
+from leaderboard import Leaderboard
+
+
+def make_users(count: int, rng: random.Random) -> dict:
+    return {
+        user_id: {'user_id': user_id, 'total_points': rng.randint(0, 5000), 'wins': 0, 'total_games': 0}
+        for user_id in range(1, count + 1)
+    }
+
+
+def resort_update(users: dict, user_id: int, points: int) -> list:
+    """The previous _update_leaderboard: sort everyone, keep the top 50"""
+    users[user_id]['total_points'] += points
+    sorted_users = sorted(users.values(), key=lambda x: x['total_points'], reverse=True)
+    return sorted_users[:50][:10]
+
+
+def incremental_update(leaderboard: Leaderboard, users: dict, user_id: int, points: int) -> list:
+    users[user_id]['total_points'] += points
+    leaderboard.update(user_id, users[user_id]['total_points'])
+    return leaderboard.top(10)
+
+
+def time_updates(update, updates: list) -> list:
+    timings = []
+    for user_id, points in updates:
+        started = time.perf_counter()
+        update(user_id, points)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--updates', type=int, default=10000)
+    parser.add_argument('--resort-updates', type=int, default=3,
+                        help='a full re-sort is slow with many users; time only this many updates')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    users = make_users(args.users, rng)
+    updates = [(rng.randint(1, args.users), rng.choice((0, 50, 100, 300))) for _ in range(args.updates)]
+
+    started = time.perf_counter()
+    leaderboard = Leaderboard((user_id, user['total_points']) for user_id, user in users.items())
+    build_time = time.perf_counter() - started
+
+    incremental_times = time_updates(lambda *update: incremental_update(leaderboard, users, *update), updates)
+    by_points = sorted(users.values(), key=lambda x: (-x['total_points'], x['user_id']))
+    correct = leaderboard.top(10) == [user['user_id'] for user in by_points[:10]]
+    resort_times = time_updates(lambda *update: resort_update(users, *update), updates[:args.resort_updates])
+
+    print(f"📊 {args.users} users, {args.updates} stats updates\n")
+    print(f"Ranking build: {build_time:.2f} s")
+    print(f"Top 10 matches a full sort: {correct}\n")
+    print(f"{'Method':<12} {'Updates':>8} {'Mean (ms)':>11} {'p99 (ms)':>10}")
+    print("-" * 44)
+    for name, timings in (('re-sort', resort_times), ('incremental', incremental_times)):
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{name:<12} {len(timings):>8} {statistics.mean(timings) * 1000:>11.3f} {p99 * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: event-loop lag while sending sign media concurrently
+
+Compares the old pattern (Path.exists() + open().read() inside the handler)
+with media_io (reads in a thread pool). A ticker coroutine measures how late
+the event loop wakes it up while the sends run.
+
+Usage: python benchmarks/bench_media_io.py [--sends 50] [--disk-latency-ms 20]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark')
+
+import media_io
+from config import CATEGORIES
+
+TICK = 0.005
+NETWORK_LATENCY = 0.02
+
+
+async def measure_lag(stop: asyncio.Event, lags: list):
+    """Record how late each TICK-second sleep wakes up"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+
+def slow_read(media_path: Path, disk_latency: float) -> bytes:
+    time.sleep(disk_latency)
+    with open(media_path, 'rb') as f:
+        return f.read()
+
+
+async def send_blocking(media_path: Path, disk_latency: float):
+    """Old handler pattern: blocking filesystem calls on the event loop"""
+    if media_path.exists():
+        slow_read(media_path, disk_latency)
+        await asyncio.sleep(NETWORK_LATENCY)
+
+
+async def send_offloaded(media_path: Path, disk_latency: float):
+    """New handler pattern: media_io keeps the event loop free"""
+    if await media_io.media_exists(media_path):
+        await media_io.read_media(media_path)
+        await asyncio.sleep(NETWORK_LATENCY)
+
+
+async def run(mode, files, sends: int, disk_latency: float):
+    stop = asyncio.Event()
+    lags = []
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+    await asyncio.sleep(TICK * 2)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(mode(files[i % len(files)], disk_latency) for i in range(sends)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        'elapsed': elapsed,
+        'max_lag': lags[-1],
+        'p99_lag': lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[-1],
+        'mean_lag': statistics.mean(lags)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sends', type=int, default=50)
+    parser.add_argument('--disk-latency-ms', type=float, default=20.0,
+                        help='Simulated per-file disk/network-volume latency')
+    args = parser.parse_args()
+
+    files = sorted(
+        path for category_dir in CATEGORIES.values() if category_dir.exists()
+        for path in category_dir.iterdir() if path.is_file()
+    )
+    if not files:
+        print("❌ No media files found under data/videos")
+        exit(1)
+
+    disk_latency = args.disk_latency_ms / 1000
+    original_read = media_io._read_file
+    media_io._read_file = lambda path: (time.sleep(disk_latency), original_read(path))[1]
+    # Keep the bytes LRU out of it: both modes read every send from disk
+    media_io.media_bytes_cache.max_bytes = 0
+
+    print(f"📊 {args.sends} concurrent sends, {len(files)} files, "
+          f"{args.disk_latency_ms:.0f} ms simulated disk latency\n")
+    print(f"{'Mode':<12} {'Total (s)':>10} {'Max lag (ms)':>14} {'p99 lag (ms)':>14} {'Mean lag (ms)':>14}")
+    print("-" * 68)
+    for name, mode in (('blocking', send_blocking), ('media_io', send_offloaded)):
+        result = asyncio.run(run(mode, files, args.sends, disk_latency))
+        print(f"{name:<12} {result['elapsed']:>10.2f} {result['max_lag'] * 1000:>14.1f} "
+              f"{result['p99_lag'] * 1000:>14.1f} {result['mean_lag'] * 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
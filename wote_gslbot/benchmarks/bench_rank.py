@@ -0,0 +1,96 @@
+"""
+Benchmark: exact global rank and percentile of any user
+
+Creates N synthetic users and times rank + percentile lookups for random
+users three ways: sorting every user (the naive exact answer), an indexed
+SQLite COUNT(*) over total_points, and leaderboard.Leaderboard.
+
+Usage: python benchmarks/bench_rank.py [--users 100000] [--lookups 10000]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark')
+
+from leaderboard import Leaderboard
+
+
+def sort_rank(scores: dict, user_id: int) -> tuple:
+    """Rank by sorting everyone; equal points share a rank"""
+    points = scores[user_id]
+    ordered = sorted(scores.values(), reverse=True)
+    rank = ordered.index(points) + 1
+    below = ordered[::-1].index(points)
+    return rank, 100.0 * below / len(ordered)
+
+
+def make_sqlite(scores: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE users (user_id INTEGER PRIMARY KEY, total_points INTEGER NOT NULL)')
+    conn.execute('CREATE INDEX idx_users_points ON users (total_points DESC)')
+    conn.executemany('INSERT INTO users VALUES (?, ?)', scores.items())
+    return conn
+
+
+def sqlite_rank(conn: sqlite3.Connection, total: int, user_id: int) -> tuple:
+    points = conn.execute('SELECT total_points FROM users WHERE user_id = ?', (user_id,)).fetchone()[0]
+    above = conn.execute('SELECT COUNT(*) FROM users WHERE total_points > ?', (points,)).fetchone()[0]
+    below = conn.execute('SELECT COUNT(*) FROM users WHERE total_points < ?', (points,)).fetchone()[0]
+    return above + 1, 100.0 * below / total
+
+
+def time_lookups(lookup, user_ids: list) -> list:
+    timings = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        lookup(user_id)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=10000)
+    parser.add_argument('--sort-lookups', type=int, default=5,
+                        help='sorting is slow with many users; time only this many lookups')
+    parser.add_argument('--sql-lookups', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scores = {user_id: rng.randint(0, 5000) for user_id in range(1, args.users + 1)}
+    user_ids = [rng.randint(1, args.users) for _ in range(args.lookups)]
+
+    leaderboard = Leaderboard(scores.items())
+    conn = make_sqlite(scores)
+
+    correct = all(
+        (leaderboard.rank(user_id), leaderboard.percentile(user_id)) == sort_rank(scores, user_id)
+        for user_id in user_ids[:args.sort_lookups]
+    )
+
+    sort_times = time_lookups(lambda user_id: sort_rank(scores, user_id), user_ids[:args.sort_lookups])
+    sql_times = time_lookups(lambda user_id: sqlite_rank(conn, args.users, user_id), user_ids[:args.sql_lookups])
+    ranking_times = time_lookups(
+        lambda user_id: (leaderboard.rank(user_id), leaderboard.percentile(user_id)), user_ids
+    )
+
+    print(f"📊 {args.users} users, rank + percentile lookups\n")
+    print(f"Matches a full sort: {correct}\n")
+    print(f"{'Method':<12} {'Lookups':>8} {'Mean (ms)':>11} {'p99 (ms)':>10}")
+    print("-" * 44)
+    for name, timings in (('sort', sort_times), ('sqlite', sql_times), ('leaderboard', ranking_times)):
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{name:<12} {len(timings):>8} {statistics.mean(timings) * 1000:>11.3f} {p99 * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: import time and cold start of the bot
+
+Runs each measurement in a fresh interpreter:
+  - import:     `python -X importtime -c "import bot_enhanced"` (total and slowest project modules)
+  - cold start: import + services.start_services() until every service is loaded
+
+Usage: python benchmarks/bench_startup.py [--runs 5]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parent.parent
+
+COLD_START = """
+import json, time
+started = time.perf_counter()
+import bot_enhanced
+imported = time.perf_counter()
+from services import start_services
+timings = start_services().result()
+print(json.dumps({'import': imported - started, 'total': time.perf_counter() - started, 'services': timings}))
+"""
+
+
+def run_python(args) -> subprocess.CompletedProcess:
+    env = dict(os.environ, TELEGRAM_BOT_TOKEN=os.environ.get('TELEGRAM_BOT_TOKEN', 'benchmark'), LOG_LEVEL='WARNING')
+    return subprocess.run([sys.executable, *args], cwd=BOT_DIR, env=env, capture_output=True, text=True, check=True)
+
+
+def import_times() -> dict:
+    """{module: (self us, cumulative us)} from -X importtime"""
+    stderr = run_python(['-X', 'importtime', '-c', 'import bot_enhanced']).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    project_modules = {path.stem for path in BOT_DIR.glob('*.py')}
+    import_runs = [import_times() for _ in range(args.runs)]
+    cold_runs = [json.loads(run_python(['-c', COLD_START]).stdout.strip().splitlines()[-1]) for _ in range(args.runs)]
+
+    total_import = statistics.median(run['bot_enhanced'][1] for run in import_runs) / 1000
+    print(f"📊 {args.runs} runs each (median)\n")
+    print(f"import bot_enhanced (-X importtime): {total_import:.1f} ms")
+    print(f"cold start, import only:             {statistics.median(r['import'] for r in cold_runs) * 1000:.1f} ms")
+    print(f"cold start, services loaded:         {statistics.median(r['total'] for r in cold_runs) * 1000:.1f} ms\n")
+
+    print(f"{'Project module':<20} {'Self (ms)':>10}")
+    print("-" * 31)
+    for name in sorted(project_modules & import_runs[0].keys(),
+                       key=lambda name: -statistics.median(run[name][0] for run in import_runs)):
+        print(f"{name:<20} {statistics.median(run[name][0] for run in import_runs) / 1000:>10.2f}")
+
+    print(f"\n{'Service':<20} {'Load (ms)':>10}")
+    print("-" * 31)
+    for name in cold_runs[0]['services']:
+        print(f"{name:<20} {statistics.median(r['services'][name] for r in cold_runs) * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,25 +2,43 @@
 Ghanaian Sign Language (GSL) Telegram Bot
 Dictionary + Competitive Multiplayer Games with Ghanaian Cultural Integration
 """
+import signal
+import hashlib
 import logging
-from pathlib import Path
 from typing import Dict, List, Optional
 import random
 import time
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import asyncio
+from telegram import (
+    Update, InlineKeyboardButton, InlineKeyboardMarkup,
+    InlineQueryResultArticle, InlineQueryResultCachedPhoto, InlineQueryResultCachedVideo,
+    InputTextMessageContent
+)
 from telegram.ext import (
     Application,
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
+    InlineQueryHandler,
     ContextTypes,
     ConversationHandler,
     filters
 )
 
-from config import BOT_TOKEN, ADMIN_USER_ID, MAX_SUGGESTIONS
+from config import (
+    BOT_TOKEN, ADMIN_USER_ID, MAX_SUGGESTIONS,
+    MEDIA_CACHE_CHAT_ID, MEDIA_PREWARM_ON_START, MEDIA_WATCH_INTERVAL,
+    INLINE_MAX_RESULTS, INLINE_CACHE_TIME, PHRASE_MAX_CLIPS, ROOM_REAP_INTERVAL
+)
 from database import db
 from game_database import game_db
+from media_cache import media_cache, send_media, send_media_group, prewarm_media, format_prewarm_stats
+from media_io import run_io, media_exists, media_bytes_cache
+from media_watcher import MediaWatcher
+from transcode import select_media_path, video_send_options
+from phrase_translator import segment_phrase, describe_segments, get_phrase_clip
+from services import start_services
+from send_scheduler import send_scheduler, in_lane, LANE_GAME, LANE_BULK
 
 # Enable logging
 logging.basicConfig(
@@ -197,6 +215,7 @@ async def start_solo_practice(query, context: ContextTypes.DEFAULT_TYPE):
     await send_solo_question(query.message.chat_id, room_id, context)
 
 
+@in_lane(LANE_GAME)
 async def send_solo_question(chat_id: int, room_id: str, context: ContextTypes.DEFAULT_TYPE):
     """Send a solo practice question"""
     game_state = game_db.get_game_state(room_id)
@@ -210,25 +229,25 @@ async def send_solo_question(chat_id: int, room_id: str, context: ContextTypes.D
     # Send video/image if available
     video_sign = question.get('video_sign')
     if video_sign:
-        result = db.search(video_sign)
+        result = question.get('info') or db.search(video_sign)
         if result:
-            media_path = Path(result['path'])
-            if media_path.exists():
+            media_path = await run_io(select_media_path, result)
+            if await media_exists(media_path):
                 try:
-                    with open(media_path, 'rb') as media_file:
-                        # Check if it's an image or video
-                        if result.get('type') == 'image':
-                            await context.bot.send_photo(
-                                chat_id=chat_id,
-                                photo=media_file,
-                                caption=f"🖼️ Question {game_state['current_question'] + 1}/3"
-                            )
-                        else:
-                            await context.bot.send_video(
-                                chat_id=chat_id,
-                                video=media_file,
-                                caption=f"🎥 Question {game_state['current_question'] + 1}/3"
-                            )
+                    # Check if it's an image or video
+                    if result.get('type') == 'image':
+                        await send_media(
+                            context.bot.send_photo, media_path, 'image',
+                            chat_id=chat_id,
+                            caption=f"🖼️ Question {game_state['current_question'] + 1}/3"
+                        )
+                    else:
+                        await send_media(
+                            context.bot.send_video, media_path, 'video',
+                            chat_id=chat_id,
+                            caption=f"🎥 Question {game_state['current_question'] + 1}/3",
+                            **video_send_options(result, media_path)
+                        )
                 except Exception as e:
                     logger.error(f"Error sending media: {e}")
     
@@ -258,6 +277,7 @@ Choose the correct sign:
     )
 
 
+@in_lane(LANE_GAME)
 async def solo_answer_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle solo practice answer"""
     query = update.callback_query
@@ -346,7 +366,7 @@ async def prompt_join_code(query, context: ContextTypes.DEFAULT_TYPE):
     text = """
 🔗 **Join a Game**
 
-Enter the 4-digit room code your friend shared:
+Enter the room code your friend shared:
 
 Type the code (e.g., 1234)
     """
@@ -408,6 +428,7 @@ _The "Start Game" button will activate when both players are ready!_
     )
 
 
+@in_lane(LANE_GAME)
 async def start_game_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start the game"""
     query = update.callback_query
@@ -445,6 +466,7 @@ async def start_game_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
     await send_question_to_all_players(context, room_id, 0)
 
 
+@in_lane(LANE_GAME)
 async def send_question_to_all_players(context: ContextTypes.DEFAULT_TYPE, room_id: str, question_idx: int):
     """Send question to all players in the room"""
     game_state = game_db.get_game_state(room_id)
@@ -463,8 +485,9 @@ async def send_question_to_all_players(context: ContextTypes.DEFAULT_TYPE, room_
         await end_game_for_all_players(context, room_id)
         return
     
-    # Set question start time
+    # Start times are stamped per player once their question is delivered
     game_state['question_start_time'] = time.time()
+    game_state['question_start_times'] = {}
     
     question = game_state['questions'][question_idx]
     
@@ -483,29 +506,34 @@ async def send_question_to_all_players(context: ContextTypes.DEFAULT_TYPE, room_
 **Select the correct sign:**
     """
     
-    # Send to all players
-    for player_id in game_state['players']:
+    # Resolve media once per question, not once per player
+    media = None
+    video_sign = question.get('video_sign')
+    if video_sign:
+        result = question.get('info') or db.search(video_sign)
+        if result:
+            media_path = await run_io(select_media_path, result)
+            if await media_exists(media_path):
+                media = (media_path, result.get('type'), video_send_options(result, media_path))
+    
+    async def deliver(player_id: int):
         try:
             # Send video/image if available
-            video_sign = question.get('video_sign')
-            if video_sign:
-                result = db.search(video_sign)
-                if result:
-                    media_path = Path(result['path'])
-                    if media_path.exists():
-                        with open(media_path, 'rb') as media_file:
-                            if result.get('type') == 'image':
-                                await context.bot.send_photo(
-                                    chat_id=player_id,
-                                    photo=media_file,
-                                    caption="🖼️ Look carefully!"
-                                )
-                            else:
-                                await context.bot.send_video(
-                                    chat_id=player_id,
-                                    video=media_file,
-                                    caption="🎥 Watch carefully!"
-                                )
+            if media:
+                media_path, media_type, video_options = media
+                if media_type == 'image':
+                    await send_media(
+                        context.bot.send_photo, media_path, 'image',
+                        chat_id=player_id,
+                        caption="🖼️ Look carefully!"
+                    )
+                else:
+                    await send_media(
+                        context.bot.send_video, media_path, 'video',
+                        chat_id=player_id,
+                        caption="🎥 Watch carefully!",
+                        **video_options
+                    )
             
             # Send question
             await context.bot.send_message(
@@ -514,10 +542,15 @@ async def send_question_to_all_players(context: ContextTypes.DEFAULT_TYPE, room_
                 reply_markup=reply_markup,
                 parse_mode='Markdown'
             )
+            game_state['question_start_times'][str(player_id)] = time.time()
         except Exception as e:
             logger.error(f"Error sending question to player {player_id}: {e}")
+    
+    # Send to all players at once so nobody gets a head start
+    await asyncio.gather(*(deliver(player_id) for player_id in game_state['players']))
 
 
+@in_lane(LANE_GAME)
 async def answer_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle answer button click"""
     query = update.callback_query
@@ -557,7 +590,10 @@ async def answer_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Record answer
         game_state['players_answered'].add(user_id)
         game_state.setdefault('question_start_time', time.time())
-        time_taken = time.time() - game_state['question_start_time']
+        start_time = game_state.get('question_start_times', {}).get(
+            str(user_id), game_state['question_start_time']
+        )
+        time_taken = time.time() - start_time
         
         result = game_db.submit_answer(room_id, user_id, answer, time_taken)
         
@@ -603,6 +639,7 @@ async def answer_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             pass
 
 
+@in_lane(LANE_GAME)
 async def end_game_for_all_players(context: ContextTypes.DEFAULT_TYPE, room_id: str):
     """End game and show results to all players"""
     game_state = game_db.get_game_state(room_id)
@@ -636,12 +673,11 @@ async def end_game_for_all_players(context: ContextTypes.DEFAULT_TYPE, room_id:
 🎊 Medaase! Keep learning GSL! 🤟
     """
     
-    # Send to all players
-    for player_id in game_state['players']:
+    keyboard = [[InlineKeyboardButton("🏠 Main Menu", callback_data='back_to_main')]]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    
+    async def deliver(player_id: int):
         try:
-            keyboard = [[InlineKeyboardButton("🏠 Main Menu", callback_data='back_to_main')]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
             await context.bot.send_message(
                 chat_id=player_id,
                 text=results_text,
@@ -650,6 +686,9 @@ async def end_game_for_all_players(context: ContextTypes.DEFAULT_TYPE, room_id:
             )
         except Exception as e:
             logger.error(f"Error sending results to player {player_id}: {e}")
+    
+    # Send to all players
+    await asyncio.gather(*(deliver(player_id) for player_id in game_state['players']))
 
 
 async def send_question(query, context: ContextTypes.DEFAULT_TYPE, room_id: str, question_idx: int):
@@ -937,6 +976,7 @@ Browse sign language videos by category or search directly:
     )
 
 
+@in_lane(LANE_BULK)
 async def browse_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle category browsing callbacks"""
     query = update.callback_query
@@ -960,7 +1000,10 @@ async def browse_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     signs_list = ', '.join(sorted(items.keys())[:50])
     total = len(items)
     
-    keyboard = [[InlineKeyboardButton("🔙 Back to Dictionary", callback_data='menu_dictionary')]]
+    keyboard = [
+        [InlineKeyboardButton("🎬 Show All Signs", callback_data=f'browseall_{category}_0')],
+        [InlineKeyboardButton("🔙 Back to Dictionary", callback_data='menu_dictionary')]
+    ]
     reply_markup = InlineKeyboardMarkup(keyboard)
     
     message = f"""
@@ -977,6 +1020,54 @@ Type any of these to see the sign video!
     await query.edit_message_text(message, reply_markup=reply_markup, parse_mode='Markdown')
 
 
+@in_lane(LANE_BULK)
+async def browse_all_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Send a category's signs as albums of up to 10, one page per tap"""
+    query = update.callback_query
+    await query.answer()
+    
+    # Parse callback data: browseall_category_page
+    category, page = query.data.replace('browseall_', '').rsplit('_', 1)
+    page = int(page)
+    
+    items, total_pages = db.get_category_page(category, page)
+    chat_id = query.message.chat_id
+    
+    def resolve_media() -> List:
+        media = []
+        for word, info in items:
+            media_path = select_media_path(info)
+            if media_path.exists():
+                media_type = info.get('type', 'video')
+                options = video_send_options(info, media_path) if media_type != 'image' else {}
+                media.append((media_path, media_type, word.title(), options))
+        return media
+    
+    media = await run_io(resolve_media)
+    
+    if media:
+        try:
+            await send_media_group(context.bot, chat_id, media)
+        except Exception as e:
+            logger.error(f"Error sending media group for {category} page {page}: {e}")
+            await context.bot.send_message(chat_id=chat_id, text="⚠️ Error sending signs. Please try again later.")
+            return
+    
+    keyboard = []
+    if page + 1 < total_pages:
+        keyboard.append([InlineKeyboardButton("▶️ Next Page", callback_data=f'browseall_{category}_{page + 1}')])
+    keyboard.append([InlineKeyboardButton("🔙 Back to Dictionary", callback_data='menu_dictionary')])
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=f"📖 **{category.capitalize()}** - page {min(page + 1, total_pages)}/{total_pages}",
+        reply_markup=reply_markup,
+        parse_mode='Markdown'
+    )
+
+
+@in_lane(LANE_BULK)
 async def dict_stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show dictionary statistics"""
     query = update.callback_query
@@ -1012,6 +1103,9 @@ async def handle_dictionary_search(update: Update, context: ContextTypes.DEFAULT
     if result:
         # Found exact match
         await send_sign_video(update, result)
+    elif len(query.split()) > 1 and await send_phrase(update, context, query):
+        # Several words: translated sign by sign
+        return
     else:
         # Try fuzzy search
         suggestions = db.fuzzy_search(query, max_results=MAX_SUGGESTIONS)
@@ -1031,11 +1125,69 @@ async def handle_dictionary_search(update: Update, context: ContextTypes.DEFAULT
             )
 
 
+async def send_phrase(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> bool:
+    """
+    Sign a whole phrase: known (multi-word) signs first, unknown words fingerspelled
+    Sends one stitched video (albums if ffmpeg is unavailable).
+    Returns False if no part of the text could be signed.
+    """
+    translation = segment_phrase(text, db.snapshot())
+    segments = translation['segments']
+    if not segments:
+        return False
+    
+    if len(segments) > PHRASE_MAX_CLIPS:
+        await update.message.reply_text(
+            f"✂️ That needs {len(segments)} signs - please send at most {PHRASE_MAX_CLIPS} at a time."
+        )
+        return True
+    
+    caption = f"🤟 {describe_segments(segments)}"
+    if translation['missing']:
+        caption += f"\n⚠️ No sign for: {', '.join(sorted(set(translation['missing'])))}"
+    
+    clip = await get_phrase_clip(segments)
+    if clip:
+        await send_media(update.message.reply_video, clip, 'video', caption=caption, supports_streaming=True)
+        return True
+    
+    # No stitched clip: send the signs in order as albums of up to 10
+    items = []
+    for segment in segments:
+        info = segment['info']
+        media_path = await run_io(select_media_path, info)
+        if not await media_exists(media_path):
+            continue
+        media_type = info.get('type', 'video')
+        options = video_send_options(info, media_path) if media_type != 'image' else {}
+        items.append((media_path, media_type, segment['word'], options))
+    
+    if not items:
+        return False
+    
+    chat_id = update.effective_chat.id
+    for start in range(0, len(items), 10):
+        await send_media_group(context.bot, chat_id, items[start:start + 10])
+    await update.message.reply_text(caption)
+    return True
+
+
+async def translate_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/translate <text>: sign a phrase, fingerspelling words without a sign"""
+    text = ' '.join(context.args)
+    if not text:
+        await update.message.reply_text("Usage: /translate good morning kofi")
+        return
+    
+    if not await send_phrase(update, context, text):
+        await update.message.reply_text(f"❌ Sorry, I couldn't sign any part of '{text}'.")
+
+
 async def send_sign_video(update: Update, video_info: Dict):
     """Send video or image file for a sign"""
-    media_path = Path(video_info['path'])
+    media_path = await run_io(select_media_path, video_info)
     
-    if not media_path.exists():
+    if not await media_exists(media_path):
         await update.message.reply_text(
             "⚠️ Media file not found. Please contact admin.",
             parse_mode='Markdown'
@@ -1048,19 +1200,19 @@ Category: {video_info.get('category', 'Unknown').capitalize()}
     """
     
     try:
-        with open(media_path, 'rb') as media_file:
-            if video_info.get('type') == 'image':
-                await update.message.reply_photo(
-                    photo=media_file,
-                    caption=caption,
-                    parse_mode='Markdown'
-                )
-            else:
-                await update.message.reply_video(
-                    video=media_file,
-                    caption=caption,
-                    parse_mode='Markdown'
-                )
+        if video_info.get('type') == 'image':
+            await send_media(
+                update.message.reply_photo, media_path, 'image',
+                caption=caption,
+                parse_mode='Markdown'
+            )
+        else:
+            await send_media(
+                update.message.reply_video, media_path, 'video',
+                caption=caption,
+                parse_mode='Markdown',
+                **video_send_options(video_info, media_path)
+            )
     except Exception as e:
         logger.error(f"Error sending media: {e}")
         await update.message.reply_text(
@@ -1069,6 +1221,37 @@ Category: {video_info.get('category', 'Unknown').capitalize()}
         )
 
 
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Inline autocomplete: `@bot hel` lists matching signs while the user types
+    Signs already uploaded are offered as cached media; the rest as text.
+    """
+    query = update.inline_query.query
+    matches = db.complete(query, INLINE_MAX_RESULTS) or db.fuzzy_search(query, INLINE_MAX_RESULTS)
+    
+    results = []
+    for item in matches:
+        word, info, category = item['word'], item['info'], item['category']
+        result_id = hashlib.md5(f"{category}/{word}".encode()).hexdigest()
+        title = f"{word.title()} ({category})"
+        caption = f"🤟 GSL sign: {word.title()}"
+        file_id = media_cache.get_file_id_for_entry(info)
+        
+        if file_id and info.get('type') == 'image':
+            results.append(InlineQueryResultCachedPhoto(result_id, file_id, title=title, caption=caption))
+        elif file_id:
+            results.append(InlineQueryResultCachedVideo(result_id, file_id, title, caption=caption))
+        else:
+            results.append(InlineQueryResultArticle(
+                result_id, title,
+                InputTextMessageContent(f"{caption}\n(Ask @{context.bot.username} to see it)"),
+                description="Not uploaded yet"
+            ))
+    
+    # Answers hold no per-user data, so Telegram can serve a prefix to everyone from its cache
+    await update.inline_query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=False)
+
+
 async def send_suggestions(update: Update, query: str, suggestions: List[Dict]):
     """Send suggestions when exact match not found"""
     suggestions_text = f"🔍 Didn't find **'{query}'**, but here are similar signs:\n\n"
@@ -1085,6 +1268,7 @@ async def send_suggestions(update: Update, query: str, suggestions: List[Dict]):
 # LEADERBOARD & STATS
 # ========================
 
+@in_lane(LANE_BULK)
 async def show_leaderboard(query, context: ContextTypes.DEFAULT_TYPE):
     """Display global leaderboard"""
     leaderboard = game_db.get_leaderboard(10)
@@ -1111,15 +1295,19 @@ async def show_leaderboard(query, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+@in_lane(LANE_BULK)
 async def show_user_stats(query, context: ContextTypes.DEFAULT_TYPE):
     """Show user's personal statistics"""
     user = query.from_user
     rank, player_stats = game_db.get_user_rank(user.id)
+    percentile = game_db.get_user_percentile(user.id)
     
     keyboard = [[InlineKeyboardButton("🔙 Back to Menu", callback_data='back_to_main')]]
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    rank_text = f"#{rank}" if rank else "Unranked"
+    rank_text = f"#{rank} of {game_db.get_player_count()}" if rank else "Unranked"
+    if rank and percentile is not None and player_stats['total_games'] > 0:
+        rank_text += f" (ahead of {percentile:.0f}% of players)"
     win_rate = (player_stats['wins'] / player_stats['total_games'] * 100) if player_stats['total_games'] > 0 else 0
     
     text = f"""
@@ -1238,6 +1426,208 @@ Need more help? Just explore the menus! 😊
     await update.message.reply_text(help_text, parse_mode='Markdown')
 
 
+# ========================
+# ADMIN COMMANDS
+# ========================
+
+@in_lane(LANE_BULK)
+async def run_prewarm(application: Application, status_chat_id: Optional[int] = None):
+    """Upload all dictionary media to the cache chat, reporting progress to status_chat_id"""
+    if application.bot_data.get('prewarm_running'):
+        return
+    application.bot_data['prewarm_running'] = True
+    
+    status_message = None
+    last_report = 0.0
+    
+    async def report(stats: Dict):
+        nonlocal last_report
+        if not status_message or time.monotonic() - last_report < 5:
+            return
+        last_report = time.monotonic()
+        try:
+            await status_message.edit_text(f"⏳ Pre-warming media...\n{format_prewarm_stats(stats)}")
+        except Exception:
+            pass
+    
+    try:
+        if status_chat_id:
+            status_message = await application.bot.send_message(
+                chat_id=status_chat_id,
+                text="⏳ Pre-warming media..."
+            )
+        
+        stats = await prewarm_media(application.bot, MEDIA_CACHE_CHAT_ID, db.dictionary, on_progress=report)
+        
+        if status_message:
+            await status_message.edit_text(f"✅ Media pre-warm finished\n{format_prewarm_stats(stats)}")
+    except Exception as e:
+        logger.error(f"Media pre-warm failed: {e}", exc_info=True)
+    finally:
+        application.bot_data['prewarm_running'] = False
+
+
+async def prewarm_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin only: upload every sign once so later sends reuse file_ids"""
+    if not ADMIN_USER_ID or update.effective_user.id != ADMIN_USER_ID:
+        await update.message.reply_text("⛔ This command is for admins only.")
+        return
+    
+    if not MEDIA_CACHE_CHAT_ID:
+        await update.message.reply_text("⚠️ Set MEDIA_CACHE_CHAT_ID to enable media pre-warm.")
+        return
+    
+    if context.bot_data.get('prewarm_running'):
+        await update.message.reply_text("⏳ Media pre-warm is already running.")
+        return
+    
+    context.application.create_task(run_prewarm(context.application, update.effective_chat.id))
+
+
+async def sendstats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin only: show outbound queue depth, wait times and media cache counters"""
+    if not ADMIN_USER_ID or update.effective_user.id != ADMIN_USER_ID:
+        await update.message.reply_text("⛔ This command is for admins only.")
+        return
+    
+    metrics = send_scheduler.get_metrics()
+    text = f"📮 **Send Scheduler**\n\nRetryAfter hits: {metrics['retry_after']}\nActive chats: {metrics['active_chats']}\n"
+    for lane, lane_metrics in metrics['lanes'].items():
+        text += (
+            f"\n**{lane}**: {lane_metrics['queued']} queued, {lane_metrics['sent']} sent, "
+            f"avg wait {lane_metrics['avg_wait'] * 1000:.0f} ms, max {lane_metrics['max_wait'] * 1000:.0f} ms"
+        )
+    
+    cache = media_bytes_cache.get_stats()
+    text += (
+        f"\n\n💾 **Media bytes cache**: {cache['entries']} files, "
+        f"{cache['bytes'] / (1024 * 1024):.1f}/{cache['max_bytes'] / (1024 * 1024):.0f} MB, "
+        f"{cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate'] * 100:.0f}%), "
+        f"{cache['evictions']} evictions"
+    )
+    
+    reaper = game_db.reaper_stats
+    text += (
+        f"\n\n🧹 **Game reaper**: {len(game_db.active_games)} active, {reaper['rooms']} rooms and "
+        f"{reaper['solo']} solo sessions reclaimed (~{reaper['bytes'] / 1024:.0f} KB) in {reaper['runs']} runs"
+    )
+    
+    await update.message.reply_text(text, parse_mode='Markdown')
+
+
+async def reload_dictionary() -> str:
+    """Rebuild the dictionary and its indexes in the I/O pool, then swap them in"""
+    started = time.monotonic()
+    version = await run_io(db.reload)
+    stats = db.get_statistics()
+    message = (
+        f"Dictionary v{version} loaded: {stats['total_signs']} signs "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+    logger.info(message)
+    return message
+
+
+async def reload_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin only: pick up new signs and transcoded variants without a restart"""
+    if not ADMIN_USER_ID or update.effective_user.id != ADMIN_USER_ID:
+        await update.message.reply_text("⛔ This command is for admins only.")
+        return
+    
+    await update.message.reply_text("🔄 Reloading dictionary...")
+    try:
+        message = await reload_dictionary()
+    except Exception as e:
+        logger.error(f"Dictionary reload failed: {e}")
+        await update.message.reply_text(f"❌ Reload failed, still serving v{db.version}: {e}")
+        return
+    await update.message.reply_text(f"✅ {message}")
+
+
+@in_lane(LANE_BULK)
+async def reap_games_job(context: ContextTypes.DEFAULT_TYPE):
+    """JobQueue task: end abandoned rooms and solo sessions and tell their players"""
+    result = game_db.reap_expired_games()
+    if not result['expired']:
+        return
+    
+    logger.info(
+        f"Reaped {result['rooms']} rooms and {result['solo']} solo sessions "
+        f"(~{result['bytes'] / 1024:.0f} KB), {len(game_db.active_games)} still active"
+    )
+    
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("🏠 Main Menu", callback_data='back_to_main')]])
+    notices = []
+    for room_id, state in result['expired']:
+        if state.get('status') == 'finished':
+            continue
+        if state.get('status') == 'waiting':
+            text = f"⌛ Room {state.get('room_code')} was closed because no opponent joined."
+        elif state.get('game_mode') == 'solo_practice':
+            text = "⌛ Your practice session expired after a while without answers."
+        else:
+            text = f"⌛ The game in room {state.get('room_code')} ended after a while without answers. No points were recorded."
+        
+        for player_id in state.get('players', []):
+            # Forget the room so the player's next message isn't taken as an answer
+            user_data = context.application.user_data.get(player_id)
+            if user_data and user_data.get('current_room') == room_id:
+                user_data.pop('current_room', None)
+            notices.append((player_id, text))
+    
+    async def notify(player_id: int, text: str):
+        try:
+            await context.bot.send_message(chat_id=player_id, text=text, reply_markup=keyboard)
+        except Exception as e:
+            logger.error(f"Error notifying player {player_id} of expired game: {e}")
+    
+    await asyncio.gather(*(notify(player_id, text) for player_id, text in notices))
+
+
+async def post_init(application: Application):
+    """Finish loading services, then start background jobs"""
+    # Services started loading in main() while the bot connected to Telegram
+    timings = await asyncio.wrap_future(application.bot_data.pop('startup'))
+    logger.info("Services ready: " + ', '.join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+    
+    if MEDIA_PREWARM_ON_START and MEDIA_CACHE_CHAT_ID:
+        application.create_task(run_prewarm(application))
+    
+    if MEDIA_WATCH_INTERVAL > 0:
+        application.bot_data['media_watcher'] = MediaWatcher(db)
+        await application.bot_data['media_watcher'].start()
+    
+    if ROOM_REAP_INTERVAL > 0:
+        if application.job_queue:
+            application.job_queue.run_repeating(
+                reap_games_job, interval=ROOM_REAP_INTERVAL, first=ROOM_REAP_INTERVAL, name='reap_games'
+            )
+        else:
+            logger.warning("JobQueue unavailable (pip install \"python-telegram-bot[job-queue]\"); abandoned games won't be reaped")
+    
+    # `kill -HUP <pid>` reloads the dictionary (not available on Windows)
+    if hasattr(signal, 'SIGHUP'):
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGHUP, lambda: application.create_task(reload_dictionary())
+            )
+        except (NotImplementedError, RuntimeError):
+            pass
+
+
+async def post_shutdown(application: Application):
+    """Stop background jobs and write pending game data and file_ids"""
+    watcher = application.bot_data.pop('media_watcher', None)
+    if watcher:
+        await watcher.stop()
+    
+    # Runs on Ctrl+C / SIGTERM too: run_polling stops on those signals
+    if game_db.is_loaded():
+        await run_io(game_db.flush)
+    if media_cache.is_loaded():
+        await run_io(media_cache.flush)
+
+
 # ========================
 # ERROR HANDLER
 # ========================
@@ -1251,16 +1641,28 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # MAIN FUNCTION
 # ========================
 
-import asyncio
-
 def main():
     """Start the bot"""
+    # Load dictionary, indexes and game data in parallel with bot setup
+    startup = start_services()
+    
     # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .rate_limiter(send_scheduler)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Command handlers
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("prewarm", prewarm_command))
+    application.add_handler(CommandHandler("sendstats", sendstats_command))
+    application.add_handler(CommandHandler("reload", reload_command))
+    application.add_handler(CommandHandler("translate", translate_command))
     
     # Main menu callbacks
     application.add_handler(CallbackQueryHandler(menu_callback, pattern='^menu_'))
@@ -1273,14 +1675,20 @@ def main():
     
     # Dictionary callbacks
     application.add_handler(CallbackQueryHandler(browse_callback, pattern='^browse_'))
+    application.add_handler(CallbackQueryHandler(browse_all_callback, pattern='^browseall_'))
     application.add_handler(CallbackQueryHandler(dict_stats_callback, pattern='^dict_stats'))
     
+    # Inline autocomplete
+    application.add_handler(InlineQueryHandler(inline_query))
+    
     # Message handler (for answers and dictionary searches)
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_answer))
     
     # Error handler
     application.add_error_handler(error_handler)
     
+    application.bot_data['startup'] = startup
+    
     # Start bot
     logger.info("🤖 GSL Bot with 2-Player Activity Recognition starting...")
     logger.info("🇬🇭 Learn GSL together!")
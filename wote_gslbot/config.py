@@ -26,6 +26,9 @@ BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / 'data'
 VIDEOS_DIR = DATA_DIR / 'videos'
 DICTIONARY_FILE = DATA_DIR / 'dictionary.json'
+MEDIA_CACHE_FILE = DATA_DIR / 'media_cache.json'  # Telegram file_ids of uploaded signs
+MEDIA_MANIFEST_FILE = DATA_DIR / 'media_manifest.json'  # content hash / size / duration per media file
+SCAN_SNAPSHOT_FILE = DATA_DIR / 'scan_snapshot.json'  # directory/file mtimes seen by the last media scan
 
 # Configurable DB file path
 DB_FILE = os.getenv('DB_FILE', './data/game_data.json')
@@ -37,9 +40,11 @@ CATEGORIES = {
     'words': VIDEOS_DIR / 'words'
 }
 
-# Create directories if they don't exist
-for category_dir in CATEGORIES.values():
-    category_dir.mkdir(parents=True, exist_ok=True)
+
+def ensure_directories():
+    """Create the media directories if they don't exist (called at startup, not on import)"""
+    for category_dir in CATEGORIES.values():
+        category_dir.mkdir(parents=True, exist_ok=True)
 
 # ============================================================
 # LOGGING
@@ -72,10 +77,85 @@ if ADMIN_USER_ID:
 WEBHOOK_URL = os.getenv('WEBHOOK_URL')  # e.g., https://<ngrok-id>.ngrok.io/webhook
 WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 5000))
 
+# ============================================================
+# OUTBOUND SEND SCHEDULER (see send_scheduler.py)
+# ============================================================
+SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', 30))  # messages/second across all chats
+SEND_CHAT_RATE = float(os.getenv('SEND_CHAT_RATE', 1))  # messages/second within one chat
+SEND_CHAT_BURST = float(os.getenv('SEND_CHAT_BURST', 3))  # short bursts allowed per chat
+SEND_MAX_RETRIES = int(os.getenv('SEND_MAX_RETRIES', 3))  # retries after a RetryAfter
+
+# ============================================================
+# MEDIA CACHE / PRE-WARM
+# ============================================================
+# Chat (e.g. a private channel) that receives pre-warm uploads; defaults to ADMIN_USER_ID
+MEDIA_CACHE_CHAT_ID = os.getenv('MEDIA_CACHE_CHAT_ID')
+if MEDIA_CACHE_CHAT_ID:
+    try:
+        MEDIA_CACHE_CHAT_ID = int(MEDIA_CACHE_CHAT_ID)
+    except ValueError:
+        MEDIA_CACHE_CHAT_ID = None
+MEDIA_CACHE_CHAT_ID = MEDIA_CACHE_CHAT_ID or ADMIN_USER_ID
+
+MEDIA_PREWARM_ON_START = os.getenv('MEDIA_PREWARM_ON_START', 'false').lower() in ('1', 'true', 'yes')
+MEDIA_PREWARM_CONCURRENCY = int(os.getenv('MEDIA_PREWARM_CONCURRENCY', 4))
+# media_cache.json is written behind: at most once per interval, or sooner after many new file_ids
+MEDIA_CACHE_FLUSH_INTERVAL = float(os.getenv('MEDIA_CACHE_FLUSH_INTERVAL', 2))  # seconds (0 = write synchronously on every change)
+MEDIA_CACHE_FLUSH_MAX_PENDING = int(os.getenv('MEDIA_CACHE_FLUSH_MAX_PENDING', 50))  # changes
+
+# ============================================================
+# MEDIA I/O (see media_io.py)
+# ============================================================
+MEDIA_IO_THREADS = int(os.getenv('MEDIA_IO_THREADS', 4))  # threads reading media off the event loop
+MEDIA_BYTES_CACHE_SIZE = int(os.getenv('MEDIA_BYTES_CACHE_SIZE', 64 * 1024 * 1024))  # LRU of hot media bytes
+# Seconds between checks for new/removed sign files while the bot runs (0 disables)
+MEDIA_WATCH_INTERVAL = float(os.getenv('MEDIA_WATCH_INTERVAL', 60))
+
+# ============================================================
+# TRANSCODED VARIANTS (see transcode.py)
+# ============================================================
+TRANSCODED_DIR = DATA_DIR / 'transcoded'
+THUMBNAILS_DIR = DATA_DIR / 'thumbnails'
+FFMPEG_BIN = os.getenv('FFMPEG_BIN', 'ffmpeg')
+FFPROBE_BIN = os.getenv('FFPROBE_BIN', 'ffprobe')
+# Largest file (bytes) the bot sends for a sign; bigger originals fall back to a smaller variant
+MEDIA_SIZE_BUDGET = int(os.getenv('MEDIA_SIZE_BUDGET', 1024 * 1024))
+
+# ============================================================
+# PHRASE TRANSLATION (see phrase_translator.py)
+# ============================================================
+STITCHED_DIR = DATA_DIR / 'stitched'  # cached phrase videos, named by clip sequence hash
+STITCH_WORKERS = int(os.getenv('STITCH_WORKERS', 2))  # concurrent ffmpeg stitch jobs
+STITCHED_CACHE_MAX_FILES = int(os.getenv('STITCHED_CACHE_MAX_FILES', 500))
+PHRASE_MAX_CLIPS = int(os.getenv('PHRASE_MAX_CLIPS', 30))  # longer phrases are refused
+
+# ============================================================
+# INLINE MODE (enable with /setinline at @BotFather)
+# ============================================================
+INLINE_MAX_RESULTS = min(int(os.getenv('INLINE_MAX_RESULTS', 20)), 50)  # Telegram allows 50 per answer
+INLINE_CACHE_TIME = int(os.getenv('INLINE_CACHE_TIME', 300))  # seconds Telegram may reuse an answer
+
 # ============================================================
 # STORAGE BACKEND
 # ============================================================
 STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json')  # 'json' or 'sqlite'
+SQLITE_FILE = Path(os.getenv('SQLITE_FILE', DATA_DIR / 'gsl_bot.sqlite3'))  # used when STORAGE_BACKEND=sqlite
+# JSON game data is written behind: at most once per interval, or sooner after many changes
+GAME_DATA_FLUSH_INTERVAL = float(os.getenv('GAME_DATA_FLUSH_INTERVAL', 2))  # seconds (0 = write synchronously on every change)
+GAME_DATA_FLUSH_MAX_PENDING = int(os.getenv('GAME_DATA_FLUSH_MAX_PENDING', 100))  # changes
+
+# Finished games are appended to a rotated JSONL log instead of game_data.json
+GAME_HISTORY_DIR = DATA_DIR / 'game_history'
+GAME_HISTORY_MAX_BYTES = int(os.getenv('GAME_HISTORY_MAX_BYTES', 4 * 1024 * 1024))  # rotate segments at this size
+GAME_HISTORY_COMPRESS = os.getenv('GAME_HISTORY_COMPRESS', 'true').lower() in ('1', 'true', 'yes')  # gzip closed segments
+
+# ============================================================
+# ABANDONED GAMES (reaped by a JobQueue task)
+# ============================================================
+ROOM_WAITING_TTL = int(os.getenv('ROOM_WAITING_TTL', 900))  # seconds a room waits for an opponent
+GAME_IDLE_TTL = int(os.getenv('GAME_IDLE_TTL', 600))  # seconds without answers before a game/solo session ends
+FINISHED_SESSION_TTL = int(os.getenv('FINISHED_SESSION_TTL', 60))  # finished solo sessions are dropped after this
+ROOM_REAP_INTERVAL = int(os.getenv('ROOM_REAP_INTERVAL', 60))  # seconds between reaper runs (0 = off)
 
 # ============================================================
 # OPTIONAL INTEGRATIONS
@@ -1,107 +1,151 @@
 """
 Video database handler for GSL Bot
 """
+import copy
 import json
+import logging
+import threading
+from bisect import bisect_left
 from pathlib import Path
-from typing import List, Dict, Optional
-import difflib
-from config import CATEGORIES, DICTIONARY_FILE, SUPPORTED_VIDEO_FORMATS, SUPPORTED_IMAGE_FORMATS
+from typing import Any, Callable, List, Dict, Optional, Tuple
+from config import CATEGORIES, SCAN_SNAPSHOT_FILE, SUPPORTED_VIDEO_FORMATS, SUPPORTED_IMAGE_FORMATS
+from json_store import write_json_atomic
+from media_manifest import media_manifest
+from search_index import FuzzyIndex, PrefixIndex, normalize_word
+from services import LazyService
+from storage import open_dictionary_store
 
+logger = logging.getLogger(__name__)
 
-class VideoDatabase:
-    """Manages GSL video dictionary"""
-    
-    def __init__(self):
-        self.dictionary = self._load_dictionary()
-        self._scan_videos()
+# Telegram media groups hold at most 10 items
+BROWSE_PAGE_SIZE = 10
+
+
+def _paginate(items: Dict) -> List[List[Tuple[str, Dict]]]:
+    """A category's (word, info) pairs, sorted by word, in pages of BROWSE_PAGE_SIZE"""
+    items = sorted(items.items())
+    return [items[i:i + BROWSE_PAGE_SIZE] for i in range(0, len(items), BROWSE_PAGE_SIZE)]
+
+
+def _repaginate(pages: List[List[Tuple[str, Dict]]], word: str, info: Dict) -> List[List[Tuple[str, Dict]]]:
+    """
+    `pages` with (word, info) added or replaced, by binary search instead of
+    a re-sort; pages before the change are shared, later ones re-sliced
+    """
+    items = [item for page in pages for item in page]
+    pos = bisect_left(items, (word,))
+    if pos < len(items) and items[pos][0] == word:
+        items[pos] = (word, info)
+    else:
+        items.insert(pos, (word, info))
+    first = pos // BROWSE_PAGE_SIZE
+    return pages[:first] + [
+        items[i:i + BROWSE_PAGE_SIZE] for i in range(first * BROWSE_PAGE_SIZE, len(items), BROWSE_PAGE_SIZE)
+    ]
+
+
+class DictionarySnapshot:
+    """
+    One published version of the dictionary with its indexes
+    Never modified after construction: updates build a new snapshot and
+    VideoDatabase swaps it in with a single attribute assignment.
+    """
     
-    def _load_dictionary(self) -> Dict:
-        """Load dictionary from JSON file"""
-        if DICTIONARY_FILE.exists():
-            with open(DICTIONARY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
-            'alphabets': {},
-            'numbers': {},
-            'words': {}
+    def __init__(self, dictionary: Dict, version: int = 0):
+        self.dictionary = dictionary
+        self.version = version
+        self.index = FuzzyIndex()  # normalized word -> {category: (word, info)}
+        self.index.build(dictionary)
+        self.prefixes = PrefixIndex(self.index.entries)
+        self.max_phrase_words = max((key.count(' ') + 1 for key in self.index.entries), default=1)
+        self.pages = {  # category -> [[(word, info), ...], ...]
+            category: _paginate(items) for category, items in dictionary.items()
         }
     
-    def _save_dictionary(self):
-        """Save dictionary to JSON file"""
-        DICTIONARY_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(DICTIONARY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.dictionary, f, indent=2, ensure_ascii=False)
-    
-    def _scan_videos(self):
-        """Scan video and image directories and update dictionary"""
-        for category, category_dir in CATEGORIES.items():
-            if not category_dir.exists():
-                continue
-            
-            for media_file in category_dir.iterdir():
-                if media_file.suffix.lower() in SUPPORTED_VIDEO_FORMATS + SUPPORTED_IMAGE_FORMATS:
-                    word = media_file.stem.upper()
-                    
-                    if word not in self.dictionary[category]:
-                        self.dictionary[category][word] = {
-                            'path': str(media_file),
-                            'filename': media_file.name,
-                            'description': f'Sign for {word}',
-                            'category': category,
-                            'type': 'video' if media_file.suffix.lower() in SUPPORTED_VIDEO_FORMATS else 'image'
-                        }
+    def with_entry(self, category: str, word: str, info: Dict) -> 'DictionarySnapshot':
+        """
+        The next version with one entry added or replaced
+        Indexes are copied and updated incrementally instead of rebuilt;
+        untouched categories and entries are shared with this snapshot.
+        """
+        items = {**self.dictionary.get(category, {}), word: info}
+        snapshot = copy.copy(self)
+        snapshot.dictionary = {**self.dictionary, category: items}
+        snapshot.version = self.version + 1
         
-        self._save_dictionary()
+        key = normalize_word(word)
+        snapshot.index = self.index.copy()
+        snapshot.index.add(word, category, info)
+        if key not in self.index.entries:
+            snapshot.prefixes = self.prefixes.copy()
+            snapshot.prefixes.add(key)
+        snapshot.max_phrase_words = max(self.max_phrase_words, key.count(' ') + 1)
+        snapshot.pages = {**self.pages, category: _repaginate(self.pages.get(category, []), word, info)}
+        return snapshot
     
     def search(self, query: str) -> Optional[Dict]:
         """
         Search for a sign by word
         Returns video info if found, None otherwise
         """
-        query = query.upper().strip()
-        
-        # Search in all categories
-        for category, items in self.dictionary.items():
-            if query in items:
-                return items[query]
-        
+        return self._first_entry(self.index.lookup(query))
+    
+    def search_many(self, queries: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Search for a batch of words in one call
+        Returns {query: video info or None}
+        """
+        return {
+            query: self._first_entry(entries)
+            for query, entries in self.index.lookup_many(queries).items()
+        }
+    
+    def search_all(self, query: str) -> Dict[str, Dict]:
+        """All entries for a word, keyed by category (a letter and a number may share a name)"""
+        return {category: info for category, (_, info) in self.index.lookup(query).items()}
+    
+    def _first_entry(self, entries: Dict) -> Optional[Dict]:
+        """Info from the first category (in dictionary order) that has the word"""
+        if len(entries) == 1:
+            return next(iter(entries.values()))[1]
+        for category in self.dictionary:
+            if category in entries:
+                return entries[category][1]
         return None
     
     def fuzzy_search(self, query: str, max_results: int = 5) -> List[Dict]:
         """
         Fuzzy search for similar signs
-        Returns list of closest matches
+        Returns list of closest matches from the prebuilt fuzzy index
         """
         query = query.upper().strip()
-        all_words = []
-        
-        # Collect all available words
-        for category, items in self.dictionary.items():
-            for word, info in items.items():
-                all_words.append({
-                    'word': word,
-                    'info': info,
-                    'category': category
-                })
-        
-        # Find closest matches
-        words_only = [item['word'] for item in all_words]
-        matches = difflib.get_close_matches(query, words_only, n=max_results, cutoff=0.4)
-        
-        # Return full info for matches
+        return self.index.suggest(query, max_results)
+    
+    def complete(self, prefix: str, max_results: int = 20) -> List[Dict]:
+        """
+        Autocomplete: signs whose word starts with `prefix`
+        Returns [{'word', 'info', 'category'}] in alphabetical order
+        """
         results = []
-        for match in matches:
-            for item in all_words:
-                if item['word'] == match:
-                    results.append(item)
-                    break
-        
-        return results
+        for key in self.prefixes.complete(prefix, max_results):
+            for category, (word, info) in self.index.entries[key].items():
+                results.append({'word': word, 'info': info, 'category': category})
+        return results[:max_results]
     
     def get_category(self, category: str) -> Dict:
         """Get all signs in a category"""
         return self.dictionary.get(category, {})
     
+    def get_category_page(self, category: str, page: int) -> Tuple[List[Tuple[str, Dict]], int]:
+        """
+        Get one page of (word, info) pairs in a category for "show all" browsing
+        Returns (items, total_pages); pages are precomputed with the snapshot
+        """
+        pages = self.pages.get(category, [])
+        if page < 0 or page >= len(pages):
+            return [], len(pages)
+        return pages[page], len(pages)
+    
     def get_all_words(self) -> List[str]:
         """Get list of all available words"""
         all_words = []
@@ -117,23 +161,267 @@ class VideoDatabase:
             'numbers': len(self.dictionary.get('numbers', {})),
             'words': len(self.dictionary.get('words', {})),
         }
+
+
+class VideoDatabase:
+    """
+    Manages GSL video dictionary
+    Reads go to the current DictionarySnapshot and never block. Rescans,
+    reloads and additions build the next snapshot on a copy (one at a time)
+    and swap it in atomically.
+    """
     
-    def add_video(self, word: str, category: str, video_path: str, description: str = None):
-        """Add a new video to the dictionary"""
-        word = word.upper()
+    def __init__(self):
+        self.store = open_dictionary_store()  # dictionary.json or the SQLite signs table
+        self._state = DictionarySnapshot(self._load_dictionary())
+        self._snapshot = self._load_snapshot()  # category -> {'mtime_ns', 'files': {name: [size, mtime_ns]}}
+        self._write_lock = threading.RLock()  # rescans may run in the media I/O pool
+        self._publish_hooks: List[Callable[[DictionarySnapshot], None]] = []
+        self.rescan()
+    
+    def snapshot(self) -> DictionarySnapshot:
+        """
+        The current dictionary version
+        Use one snapshot for a sequence of related reads (e.g. generating a
+        quiz) so a reload in between cannot mix two versions.
+        """
+        return self._state
+    
+    @property
+    def dictionary(self) -> Dict:
+        return self._state.dictionary
+    
+    @property
+    def version(self) -> int:
+        return self._state.version
+    
+    def _publish(self, dictionary: Dict):
+        """Index `dictionary`, make it the current snapshot and store it"""
+        previous = self._state.dictionary
+        self._state = DictionarySnapshot(dictionary, self._state.version + 1)
+        self._save_dictionary(previous)
+        self._run_publish_hooks()
+    
+    def _run_publish_hooks(self):
+        for hook in self._publish_hooks:
+            try:
+                hook(self._state)
+            except Exception as e:
+                logger.error(f"Dictionary publish hook failed: {e}", exc_info=True)
+    
+    def on_publish(self, hook: Callable[[DictionarySnapshot], None]):
+        """Call `hook(snapshot)` after every new dictionary version (on the publishing thread)"""
+        self._publish_hooks.append(hook)
+    
+    def _load_dictionary(self) -> Dict:
+        """Load dictionary from the storage backend"""
+        if self.store.exists():
+            return self.store.load()
+        return {
+            'alphabets': {},
+            'numbers': {},
+            'words': {}
+        }
+    
+    def _save_dictionary(self, previous: Dict = None):
+        """
+        Save dictionary to the storage backend
+        JSON rewrites the file atomically; SQLite only writes the entries that
+        differ from `previous` (default: what is stored).
+        """
+        self.store.save(self.dictionary, previous)
+    
+    def _load_snapshot(self) -> Dict:
+        """Load the directory snapshot of the last scan"""
+        # A snapshot without its dictionary describes nothing we have
+        if SCAN_SNAPSHOT_FILE.exists() and self.store.exists():
+            try:
+                with open(SCAN_SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable scan snapshot {SCAN_SNAPSHOT_FILE}: {e}")
+        return {}
+    
+    def _list_category(self, category_dir: Path) -> Dict:
+        """{filename: [size, mtime_ns]} of the media files in a directory"""
+        files = {}
+        for media_file in category_dir.iterdir():
+            if media_file.suffix.lower() in SUPPORTED_VIDEO_FORMATS + SUPPORTED_IMAGE_FORMATS:
+                try:
+                    stat = media_file.stat()
+                except OSError:
+                    continue
+                files[media_file.name] = [stat.st_size, stat.st_mtime_ns]
+        return files
+    
+    def _apply_category(self, dictionary: Dict, category: str, category_dir: Path,
+                        old_files: Dict, files: Dict) -> bool:
+        """
+        Apply the files added/removed since `old_files` to `dictionary`
+        Returns whether the category changed
+        """
+        items = dictionary.setdefault(category, {})
+        changed = False
         
-        if category not in self.dictionary:
-            self.dictionary[category] = {}
+        # Removals first, so a sign whose file was swapped (A.mp4 -> A.png) is re-added below
+        removed_words = set()
+        for name in old_files.keys() - files.keys():
+            # Only drop entries the scanner created for this very file
+            word = Path(name).stem.upper()
+            if items.get(word, {}).get('path') == str(category_dir / name):
+                del items[word]
+                removed_words.add(word)
+                changed = True
         
-        self.dictionary[category][word] = {
+        # New files, plus any remaining file of a word that just lost its file
+        added = files.keys() - old_files.keys()
+        if removed_words:
+            added |= {name for name in files if Path(name).stem.upper() in removed_words}
+        
+        for name in sorted(added):
+            media_file = category_dir / name
+            word = media_file.stem.upper()
+            if word not in items:
+                items[word] = {
+                    'path': str(media_file),
+                    'filename': media_file.name,
+                    'description': f'Sign for {word}',
+                    'category': category,
+                    'type': 'video' if media_file.suffix.lower() in SUPPORTED_VIDEO_FORMATS else 'image'
+                }
+                changed = True
+        
+        # Files whose size/mtime changed are re-hashed by the media manifest
+        return changed or any(old_files.get(name) != stat for name, stat in files.items() if name in old_files)
+    
+    def rescan(self, full: bool = False) -> bool:
+        """
+        Incrementally sync the media directories into the dictionary
+        Categories whose directory mtime matches the stored snapshot are skipped
+        (unless `full`); a new dictionary version is only built, published and
+        written when something changed. Returns True if the dictionary changed.
+        """
+        with self._write_lock:
+            return self._rescan(full)
+    
+    def _rescan(self, full: bool, base: Dict = None) -> bool:
+        """Rescan on top of `base` (default: a copy of the current dictionary); a base is always published"""
+        snapshot = {}
+        listings = {}  # category -> (directory, previous files, current files)
+        for category, category_dir in CATEGORIES.items():
+            try:
+                mtime_ns = category_dir.stat().st_mtime_ns
+            except OSError:
+                continue
+            
+            previous = self._snapshot.get(category, {})
+            if not full and previous.get('mtime_ns') == mtime_ns:
+                snapshot[category] = previous
+                continue
+            
+            files = self._list_category(category_dir)
+            snapshot[category] = {'mtime_ns': mtime_ns, 'files': files}
+            if files != previous.get('files'):
+                listings[category] = (category_dir, previous.get('files', {}), files)
+        
+        if base is None and self.store.modified_elsewhere():
+            # e.g. transcode.py recorded variants: build on the stored version so they are kept
+            logger.info("Dictionary changed on disk by another process, reloading it")
+            base = self._load_dictionary()
+        
+        dirty = False
+        if listings or full or not self._snapshot or base is not None:
+            # Readers keep using the current version while the next one is built
+            dictionary = base if base is not None else copy.deepcopy(self.dictionary)
+            changed_categories = [
+                category for category, listing in listings.items()
+                if self._apply_category(dictionary, category, *listing)
+            ]
+            
+            # Hash new/changed files and link entries to their content blobs
+            stats = media_manifest.build(dictionary)
+            dirty = bool(changed_categories) or stats['updated_entries'] > 0 or base is not None
+            if dirty:
+                self._publish(dictionary)
+                reason = changed_categories or ('reloaded from disk' if base is not None else 'metadata')
+                logger.info(f"Dictionary v{self.version} published: {reason}")
+        
+        if snapshot != self._snapshot:
+            self._snapshot = snapshot
+            write_json_atomic(SCAN_SNAPSHOT_FILE, snapshot)
+        
+        return dirty
+    
+    def reload(self) -> int:
+        """
+        Re-read the stored dictionary (e.g. after transcode.py) and rescan every directory
+        The new version is swapped in atomically; returns its version number
+        """
+        with self._write_lock:
+            self._rescan(full=True, base=self._load_dictionary())
+            return self.version
+    
+    def add_video(self, word: str, category: str, video_path: str, description: str = None):
+        """
+        Add a new video to the dictionary
+        Only the new entry is hashed, indexed and stored: the next snapshot
+        gets incrementally updated copies of the current indexes.
+        """
+        word = word.upper()
+        info = {
             'path': video_path,
             'filename': Path(video_path).name,
             'description': description or f'Sign for {word}',
             'category': category
         }
         
-        self._save_dictionary()
+        with self._write_lock:
+            media_manifest.link_entry(category, word, info)
+            self._state = self._state.with_entry(category, word, info)
+            self.store.save_entries(self.dictionary, [(category, word)])
+            self._run_publish_hooks()
+    
+    def update(self, change: Callable[[Dict], Any]) -> Any:
+        """
+        Apply `change` to a copy of the dictionary and publish the result as the
+        next version (e.g. transcode.py recording variants); returns what `change` returns
+        """
+        with self._write_lock:
+            dictionary = copy.deepcopy(self.dictionary)
+            result = change(dictionary)
+            self._publish(dictionary)
+            logger.info(f"Dictionary v{self.version} published: updated entries")
+            return result
+    
+    # Reads go to the current snapshot
+    
+    def search(self, query: str) -> Optional[Dict]:
+        return self._state.search(query)
+    
+    def search_many(self, queries: List[str]) -> Dict[str, Optional[Dict]]:
+        return self._state.search_many(queries)
+    
+    def search_all(self, query: str) -> Dict[str, Dict]:
+        return self._state.search_all(query)
+    
+    def fuzzy_search(self, query: str, max_results: int = 5) -> List[Dict]:
+        return self._state.fuzzy_search(query, max_results)
+    
+    def complete(self, prefix: str, max_results: int = 20) -> List[Dict]:
+        return self._state.complete(prefix, max_results)
+    
+    def get_category(self, category: str) -> Dict:
+        return self._state.get_category(category)
+    
+    def get_category_page(self, category: str, page: int) -> Tuple[List[Tuple[str, Dict]], int]:
+        return self._state.get_category_page(category, page)
+    
+    def get_all_words(self) -> List[str]:
+        return self._state.get_all_words()
+    
+    def get_statistics(self) -> Dict:
+        return self._state.get_statistics()
 
 
-# Singleton instance
-db = VideoDatabase()
+# Singleton instance (loaded on first use or by services.start_services)
+db = LazyService('video database', VideoDatabase)
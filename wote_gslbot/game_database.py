@@ -8,6 +8,12 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
+from config import ROOM_WAITING_TTL, GAME_IDLE_TTL, FINISHED_SESSION_TTL
+from services import LazyService
+from game_history import GameHistory
+from leaderboard import Leaderboard
+from room_registry import RoomRegistry, approx_size
+from storage import LEADERBOARD_SIZE, leaderboard_entry, open_game_store
 
 # Paths
 BASE_DIR = Path(__file__).parent
@@ -20,27 +26,26 @@ class GameDatabase:
     """Manages competitive gaming data"""
     
     def __init__(self):
-        self.game_data = self._load_game_data()
+        self.store = open_game_store(GAME_DATA_FILE)  # game_data.json or the SQLite users table
+        self.leaderboard = Leaderboard(self.store.iter_scores())
+        self.history = GameHistory()  # append-only log of finished games
+        self._import_legacy_history()
         self.cultural_content = self._load_cultural_content()
-        self.active_games = {}  # room_id -> game_state
+        self.active_games = RoomRegistry()  # room_id -> game_state, indexed by room code
+        self.reaper_stats = {'runs': 0, 'rooms': 0, 'solo': 0, 'bytes': 0}
         self.pending_challenges = {}  # challenge_id -> challenge_data
     
-    def _load_game_data(self) -> Dict:
-        """Load game data from JSON"""
-        if GAME_DATA_FILE.exists():
-            with open(GAME_DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {
-            'users': {},  # user_id -> user_stats
-            'leaderboard': [],
-            'game_history': []
-        }
+    def _import_legacy_history(self):
+        """Move the game_history array of an old game_data.json into the log (once)"""
+        legacy = self.store.legacy_history()
+        if legacy and not self.history.count():
+            self.history.extend(legacy)
+        if legacy:
+            self.store.drop_legacy_history()
     
-    def _save_game_data(self):
-        """Save game data to JSON"""
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        with open(GAME_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.game_data, f, indent=2, ensure_ascii=False)
+    def flush(self):
+        """Write pending game data changes now (called on shutdown)"""
+        self.store.flush()
     
     def _load_cultural_content(self) -> Dict:
         """Load Ghanaian cultural content"""
@@ -74,10 +79,10 @@ class GameDatabase:
     
     def get_or_create_user(self, user_id: int, username: str = None, first_name: str = None) -> Dict:
         """Get user stats or create new user"""
-        user_id_str = str(user_id)
+        user = self.store.get_user(user_id)
         
-        if user_id_str not in self.game_data['users']:
-            self.game_data['users'][user_id_str] = {
+        if user is None:
+            user = {
                 'user_id': user_id,
                 'username': username,
                 'first_name': first_name,
@@ -90,9 +95,10 @@ class GameDatabase:
                 'created_at': datetime.now().isoformat(),
                 'last_played': None
             }
-            self._save_game_data()
+            self.store.put_user(user)
+            self.leaderboard.update(user_id, 0)
         
-        return self.game_data['users'][user_id_str]
+        return user
     
     def update_user_stats(self, user_id: int, points: int, won: bool = False):
         """Update user statistics after a game"""
@@ -111,8 +117,8 @@ class GameDatabase:
         # Check for achievements
         self._check_achievements(user)
         
-        self._save_game_data()
-        self._update_leaderboard()
+        self.store.put_user(user)
+        self._update_leaderboard(user)
     
     def _check_achievements(self, user: Dict):
         """Check and award achievements"""
@@ -139,56 +145,38 @@ class GameDatabase:
     # LEADERBOARD
     # ========================
     
-    def _update_leaderboard(self):
-        """Update global leaderboard"""
-        users = list(self.game_data['users'].values())
-        
-        # Sort by total points descending
-        sorted_users = sorted(users, key=lambda x: x['total_points'], reverse=True)
-        
-        # Take top 50
-        self.game_data['leaderboard'] = [
-            {
-                'user_id': user['user_id'],
-                'username': user.get('username', 'Anonymous'),
-                'first_name': user.get('first_name', 'User'),
-                'total_points': user['total_points'],
-                'wins': user['wins'],
-                'total_games': user['total_games']
-            }
-            for user in sorted_users[:50]
-        ]
-        
-        self._save_game_data()
+    def _update_leaderboard(self, user: Dict):
+        """Re-rank one user (O(log U)); the stored top 50 is refreshed only if it changed"""
+        was_top = self.leaderboard.in_top(user['user_id'], LEADERBOARD_SIZE)
+        self.leaderboard.update(user['user_id'], user['total_points'])
+        if was_top or self.leaderboard.in_top(user['user_id'], LEADERBOARD_SIZE):
+            self.store.save_leaderboard(self.get_leaderboard(LEADERBOARD_SIZE))
     
     def get_leaderboard(self, limit: int = 10) -> List[Dict]:
         """Get top players"""
-        return self.game_data['leaderboard'][:limit]
+        limit = min(limit, LEADERBOARD_SIZE)
+        return [leaderboard_entry(self.store.get_user(user_id)) for user_id in self.leaderboard.top(limit)]
     
     def get_user_rank(self, user_id: int) -> Tuple[int, Dict]:
-        """Get user's rank on leaderboard"""
-        for rank, player in enumerate(self.game_data['leaderboard'], start=1):
-            if player['user_id'] == user_id:
-                return rank, player
-        
-        # User not on leaderboard yet
+        """Get user's global rank (players with equal points share a rank) and stats"""
         user = self.get_or_create_user(user_id)
-        return None, user
+        return self.leaderboard.rank(user_id), user
+    
+    def get_user_percentile(self, user_id: int) -> Optional[float]:
+        """Percentage of players with fewer points than this user"""
+        return self.leaderboard.percentile(user_id)
+    
+    def get_player_count(self) -> int:
+        """Number of ranked players"""
+        return len(self.leaderboard)
     
     # ========================
     # GAME ROOMS
     # ========================
     
     def create_game_room(self, host_id: int, game_mode: str, cultural_category: str = None) -> str:
-        """Create a new game room"""
-        import random
-        # Create a simple 4-digit room code
-        room_code = str(random.randint(1000, 9999))
-        room_id = f"room_{room_code}"
-        
-        self.active_games[room_id] = {
-            'room_id': room_id,
-            'room_code': room_code,
+        """Create a new game room (with a room code no other open room uses)"""
+        room_id, _ = self.active_games.create({
             'host_id': host_id,
             'players': [host_id],
             'player_names': {},
@@ -201,7 +189,8 @@ class GameDatabase:
             'scores': {str(host_id): 0},
             'answers': {},
             'players_answered': set()
-        }
+        })
+        self._touch(room_id)
         
         return room_id
     
@@ -223,15 +212,13 @@ class GameDatabase:
             room['players'].append(user_id)
             room['scores'][str(user_id)] = 0
             room['player_names'][str(user_id)] = username or f"Player {len(room['players'])}"
+        self._touch(room_id)
         
         return True
     
     def find_room_by_code(self, room_code: str) -> Optional[str]:
         """Find room ID by room code"""
-        for room_id, room in self.active_games.items():
-            if room.get('room_code') == room_code:
-                return room_id
-        return None
+        return self.active_games.find_by_code(room_code)
     
     def start_game(self, room_id: str) -> bool:
         """Start the game in a room"""
@@ -240,6 +227,7 @@ class GameDatabase:
         
         room = self.active_games[room_id]
         room['status'] = 'playing'
+        self._touch(room_id)
         
         # Generate questions based on game mode
         room['questions'] = self._generate_questions(
@@ -259,49 +247,29 @@ class GameDatabase:
     
     def _generate_questions(self, game_mode: str, cultural_category: str = None) -> List[Dict]:
         """Generate quiz questions based on game mode"""
-        import random
-        from database import db
+        from question_bank import question_bank
         import logging
         logger = logging.getLogger(__name__)
         
         questions = []
         
         if game_mode == 'activities':
-            # Get all available words from database (same as solo practice)
-            all_words = list(db.get_category('words').keys())
-            
-            logger.info(f"_generate_questions: Found {len(all_words)} words in database: {all_words}")
+            # 5 words with 3 distractors each, dealt from the precomputed bank
+            drawn = question_bank.draw(5)
             
-            if len(all_words) < 4:
+            if not drawn:
                 # Not enough words
-                logger.error(f"_generate_questions: Not enough words! Need at least 4, found {len(all_words)}")
+                logger.error("_generate_questions: Not enough words! Need at least 4")
                 return []
             
-            # Select 5 random words for multiplayer questions
-            question_words = random.sample(all_words, min(5, len(all_words)))
-            
-            for word in question_words:
-                # Get correct answer
-                correct_answer = word
-                
-                # Get video path
-                word_info = db.search(word)
-                video_path = word_info['path'] if word_info else None
-                
-                # Generate wrong answers (3 other random words)
-                wrong_answers = [w for w in all_words if w != word]
-                wrong_options = random.sample(wrong_answers, min(3, len(wrong_answers)))
-                
-                # Create options list
-                options = [correct_answer] + wrong_options
-                random.shuffle(options)
-                
+            for item in drawn:
                 questions.append({
                     'type': 'activity',
                     'question': f"What sign is this?",
-                    'correct_answer': correct_answer,
-                    'options': options,
-                    'video_sign': word
+                    'correct_answer': item['word'],
+                    'options': item['options'],
+                    'video_sign': item['word'],
+                    'info': item['info']
                 })
         
         return questions
@@ -313,6 +281,7 @@ class GameDatabase:
         
         room = self.active_games[room_id]
         current_q = room['questions'][room['current_question']]
+        self._touch(room_id)
         
         # Calculate points based on correctness and speed (exact match, case-insensitive)
         is_correct = answer.upper().strip() == current_q['correct_answer'].upper().strip()
@@ -361,6 +330,7 @@ class GameDatabase:
         
         room = self.active_games[room_id]
         room['current_question'] += 1
+        self._touch(room_id)
         
         if room['current_question'] >= len(room['questions']):
             # Game over
@@ -389,7 +359,7 @@ class GameDatabase:
             self.update_user_stats(player_id, room['scores'][str(player_id)], won)
         
         # Save game history
-        self.game_data['game_history'].append({
+        self.history.append({
             'room_id': room_id,
             'game_mode': room['game_mode'],
             'players': room['players'],
@@ -398,7 +368,6 @@ class GameDatabase:
             'winner_score': winner_score,
             'played_at': datetime.now().isoformat()
         })
-        self._save_game_data()
         
         result = {
             'winner_id': winner_id,
@@ -411,10 +380,44 @@ class GameDatabase:
         }
         
         # Remove game from active games to prevent stale state access
-        del self.active_games[room_id]
+        self.active_games.remove(room_id)
         
         return result
     
+    def _touch(self, room_id: str):
+        """Push back a room's expiry after activity (TTL depends on its status)"""
+        status = self.active_games[room_id].get('status')
+        if status == 'waiting':
+            ttl = ROOM_WAITING_TTL
+        elif status == 'finished':
+            ttl = FINISHED_SESSION_TTL
+        else:
+            ttl = GAME_IDLE_TTL
+        self.active_games.touch(room_id, ttl)
+    
+    def reap_expired_games(self, now: float = None) -> Dict:
+        """
+        Drop rooms and solo sessions whose TTL ran out
+        Only rooms due for expiry are looked at (heap ordered by expiry time).
+        Returns {'expired': [(room_id, state)], 'rooms', 'solo', 'bytes'}
+        """
+        expired = self.active_games.pop_expired(now)
+        result = {
+            'expired': expired,
+            'rooms': sum(1 for _, state in expired if state.get('game_mode') != 'solo_practice'),
+            'solo': sum(1 for _, state in expired if state.get('game_mode') == 'solo_practice'),
+            'bytes': sum(approx_size(state) for _, state in expired)
+        }
+        
+        self.reaper_stats['runs'] += 1
+        for key in ('rooms', 'solo', 'bytes'):
+            self.reaper_stats[key] += result[key]
+        return result
+    
+    def get_recent_games(self, user_id: int, limit: int = 10) -> List[Dict]:
+        """A player's most recent finished games, newest first"""
+        return self.history.games_for_user(user_id, limit)
+    
     def get_game_state(self, room_id: str) -> Optional[Dict]:
         """Get current game state"""
         return self.active_games.get(room_id)
@@ -453,47 +456,29 @@ class GameDatabase:
     
     def create_solo_practice(self, user_id: int) -> str:
         """Create a solo practice session with 3 questions from words"""
-        import random
-        from database import db
+        from question_bank import question_bank
         
         room_id = f"solo_{user_id}_{int(time.time())}"
         
-        # Get all available words from database
-        all_words = list(db.get_category('words').keys())
+        # 3 words with 3 distractors each, dealt from the precomputed bank
+        drawn = question_bank.draw(3)
         
-        if len(all_words) < 4:
+        if not drawn:
             # Not enough words for practice
             return None
         
-        # Select 3 random words for questions
-        question_words = random.sample(all_words, min(3, len(all_words)))
-        
         questions = []
-        for word in question_words:
-            # Get correct answer
-            correct_answer = word
-            
-            # Get video path
-            word_info = db.search(word)
-            video_path = word_info['path'] if word_info else None
-            
-            # Generate wrong answers (3 other random words)
-            wrong_answers = [w for w in all_words if w != word]
-            wrong_options = random.sample(wrong_answers, min(3, len(wrong_answers)))
-            
-            # Create options list
-            options = [correct_answer] + wrong_options
-            random.shuffle(options)
-            
+        for item in drawn:
             questions.append({
                 'question': f"What sign is this?",
-                'video_sign': word,
-                'correct_answer': correct_answer,
-                'options': options,
-                'video_path': video_path
+                'video_sign': item['word'],
+                'correct_answer': item['word'],
+                'options': item['options'],
+                'video_path': item['info']['path'] if item['info'] else None,
+                'info': item['info']
             })
         
-        self.active_games[room_id] = {
+        self.active_games.add(room_id, {
             'room_id': room_id,
             'game_mode': 'solo_practice',
             'players': [user_id],
@@ -503,7 +488,8 @@ class GameDatabase:
             'scores': {str(user_id): 0},
             'answers': {},
             'created_at': time.time()
-        }
+        })
+        self._touch(room_id)
         
         return room_id
     
@@ -534,6 +520,7 @@ class GameDatabase:
             # Update user stats
             total_score = room['scores'][str(user_id)]
             self.update_user_stats(user_id, total_score, won=total_score >= 200)
+        self._touch(room_id)
         
         return {
             'success': True,
@@ -547,5 +534,5 @@ class GameDatabase:
         }
 
 
-# Singleton instance
-game_db = GameDatabase()
+# Singleton instance (loaded on first use or by services.start_services)
+game_db = LazyService('game database', GameDatabase)
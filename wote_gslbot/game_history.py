@@ -0,0 +1,232 @@
+"""
+Append-only log of finished games for the GSL bot
+Each game is one JSON line appended to the active segment
+(data/game_history/games-000001.jsonl). Once a segment reaches
+GAME_HISTORY_MAX_BYTES it is closed, optionally gzip-compressed, and
+summarized in the sidecar index.json (game count, time range, players).
+Queries use the index to open only the segments that can match and stream
+them line by line, so the history is never loaded whole.
+"""
+import os
+import json
+import gzip
+import shutil
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Union
+from config import GAME_HISTORY_DIR, GAME_HISTORY_MAX_BYTES, GAME_HISTORY_COMPRESS
+from json_store import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'games-'
+
+
+def _segment_number(path: Path) -> int:
+    return int(path.name[len(SEGMENT_PREFIX):].split('.')[0])
+
+
+def _timestamp(value: Union[str, datetime]) -> str:
+    """played_at values are ISO strings, which sort chronologically"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _summarize(records: Iterator[Dict]) -> Dict:
+    summary = {'count': 0, 'first_at': None, 'last_at': None, 'users': set()}
+    for record in records:
+        _add_to_summary(summary, record)
+    return summary
+
+
+def _add_to_summary(summary: Dict, record: Dict):
+    played_at = record.get('played_at')
+    summary['count'] += 1
+    if played_at:
+        if summary['first_at'] is None or played_at < summary['first_at']:
+            summary['first_at'] = played_at
+        if summary['last_at'] is None or played_at > summary['last_at']:
+            summary['last_at'] = played_at
+    summary['users'].update(record.get('players', []))
+
+
+class GameHistory:
+    """Rotated JSONL game log with a per-segment index"""
+
+    def __init__(self, directory: Path = GAME_HISTORY_DIR, max_bytes: int = GAME_HISTORY_MAX_BYTES,
+                 compress: bool = GAME_HISTORY_COMPRESS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.index_file = directory / 'index.json'
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.segments = self._load_index()  # closed segments: file name -> summary
+        self.active_path = self._find_active()
+        self.active = _summarize(self._read_segment(self.active_path))
+        self._file = open(self.active_path, 'a', encoding='utf-8')
+        self._repair_tail()
+
+    # ========================
+    # INDEX
+    # ========================
+
+    def _load_index(self) -> Dict[str, Dict]:
+        segments = {}
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    for name, summary in json.load(f).items():
+                        summary['users'] = set(summary['users'])
+                        segments[name] = summary
+            except (OSError, ValueError) as e:
+                logger.warning(f"Rebuilding unreadable game history index: {e}")
+                segments = {}
+
+        # Closed segments missing from the index (e.g. a crash during rotation) are rescanned
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*.jsonl.gz"):
+            if path.name not in segments:
+                segments[path.name] = _summarize(self._read_segment(path))
+        return segments
+
+    def _save_index(self):
+        write_json_atomic(self.index_file, {
+            name: {**summary, 'users': sorted(summary['users'])}
+            for name, summary in sorted(self.segments.items())
+        })
+
+    def _find_active(self) -> Path:
+        """The newest segment that is not closed yet (or a new one)"""
+        numbers = [_segment_number(path) for path in self.directory.glob(f"{SEGMENT_PREFIX}*.jsonl*")]
+        newest = max(numbers, default=1)
+        path = self.directory / f"{SEGMENT_PREFIX}{newest:06d}.jsonl"
+        if path.with_name(path.name + '.gz').exists():
+            # Compressed before a crash, but the original was not removed yet
+            path.unlink(missing_ok=True)
+        if path.name in self.segments or path.with_name(path.name + '.gz').exists():
+            path = self.directory / f"{SEGMENT_PREFIX}{newest + 1:06d}.jsonl"
+        return path
+
+    def _repair_tail(self):
+        """Terminate a line cut short by a crash so the next record starts cleanly"""
+        if self.active_path.stat().st_size == 0:
+            return
+        with open(self.active_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                self._file.write('\n')
+                self._file.flush()
+
+    # ========================
+    # WRITING
+    # ========================
+
+    def append(self, record: Dict):
+        """Append one finished game"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            _add_to_summary(self.active, record)
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+    def extend(self, records: List[Dict]):
+        """Append several games (e.g. when importing the old game_data.json history)"""
+        for record in records:
+            self.append(record)
+
+    def _rotate(self):
+        """Close the active segment, compress it and start the next one"""
+        self._file.close()
+        closed = self.active_path
+        if self.compress:
+            compressed = closed.with_name(closed.name + '.gz')
+            tmp_path = compressed.with_name(compressed.name + '.tmp')
+            with open(closed, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp_path, compressed)
+            closed.unlink()
+            closed = compressed
+
+        self.segments[closed.name] = self.active
+        self._save_index()
+        logger.info(f"Game history: closed {closed.name} ({self.active['count']} games)")
+
+        self.active_path = self.directory / f"{SEGMENT_PREFIX}{_segment_number(closed) + 1:06d}.jsonl"
+        self.active = _summarize([])
+        self._file = open(self.active_path, 'a', encoding='utf-8')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    # ========================
+    # QUERIES
+    # ========================
+
+    def _read_segment(self, path: Path) -> Iterator[Dict]:
+        """Stream the records of one segment (skipping a torn last line)"""
+        if not path.exists():
+            return
+        opener = gzip.open if path.suffix == '.gz' else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def _matching_segments(self, user_id: Optional[int], start: Optional[str], end: Optional[str]) -> List[Path]:
+        """Segments whose summary can contain matches, newest first"""
+        with self._lock:
+            candidates = list(self.segments.items()) + [(self.active_path.name, self.active)]
+        paths = []
+        for name, summary in candidates:
+            if not summary['count']:
+                continue
+            if user_id is not None and user_id not in summary['users']:
+                continue
+            if start is not None and summary['last_at'] is not None and summary['last_at'] < start:
+                continue
+            if end is not None and summary['first_at'] is not None and summary['first_at'] > end:
+                continue
+            paths.append(self.directory / name)
+        return sorted(paths, key=_segment_number, reverse=True)
+
+    def query(self, user_id: Optional[int] = None, start: Union[str, datetime, None] = None,
+              end: Union[str, datetime, None] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Finished games, newest first
+        Filters: a player's user id and/or a played_at range (inclusive).
+        """
+        start = _timestamp(start) if start is not None else None
+        end = _timestamp(end) if end is not None else None
+
+        results = []
+        for path in self._matching_segments(user_id, start, end):
+            matches = [
+                record for record in self._read_segment(path)
+                if (user_id is None or user_id in record.get('players', []))
+                and (start is None or record.get('played_at', '') >= start)
+                and (end is None or record.get('played_at', '') <= end)
+            ]
+            results.extend(reversed(matches))
+            if limit is not None and len(results) >= limit:
+                return results[:limit]
+        return results
+
+    def games_for_user(self, user_id: int, limit: Optional[int] = 20) -> List[Dict]:
+        """A player's most recent games"""
+        return self.query(user_id=user_id, limit=limit)
+
+    def games_between(self, start: Union[str, datetime], end: Union[str, datetime],
+                      limit: Optional[int] = None) -> List[Dict]:
+        """Games played in [start, end]"""
+        return self.query(start=start, end=end, limit=limit)
+
+    def count(self) -> int:
+        with self._lock:
+            return self.active['count'] + sum(summary['count'] for summary in self.segments.values())
@@ -0,0 +1,116 @@
+"""
+Crash-safe JSON files for the GSL bot
+Data is written to a temporary file in the same directory and renamed over
+the target, so readers (and a bot killed mid-write) never see a truncated file.
+WriteBehindJson batches frequent changes into one such write.
+"""
+import os
+import json
+import atexit
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a failed write-behind flush is retried (at least)
+RETRY_DELAY = 1.0
+
+
+def write_json_atomic(path: Path, data, indent: int = 2):
+    """Serialize `data` to `path` via write-to-temp + os.replace"""
+    write_text_atomic(path, json.dumps(data, indent=indent, ensure_ascii=False))
+
+
+def write_text_atomic(path: Path, text: str):
+    """Write `text` to `path` via write-to-temp + os.replace"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600 files; keep the target's permissions
+        os.chmod(tmp_path, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class WriteBehindJson:
+    """
+    Debounced atomic writes of an in-memory JSON document
+    mark_dirty() is cheap: the document is written by a background timer
+    `interval` seconds after the first unsaved change, or right away once
+    `max_pending` changes are waiting. With `interval` <= 0 every
+    mark_dirty() writes synchronously instead. Callers mutate the document
+    while holding `lock` and call mark_dirty() after releasing it; the lock
+    is held only while serializing, not during disk I/O.
+    flush() writes synchronously and also runs at interpreter exit.
+    """
+
+    def __init__(self, path: Path, get_data: Callable, interval: float, max_pending: int,
+                 lock: Optional[threading.RLock] = None, indent: int = 2):
+        self.path = path
+        self.get_data = get_data
+        self.interval = interval
+        self.max_pending = max_pending
+        self.lock = lock or threading.RLock()
+        self.indent = indent
+        self.pending = 0  # changes since the last flush
+        self.flushes = 0
+        self._timer: Optional[threading.Timer] = None
+        self._flush_lock = threading.Lock()  # keeps writes in order
+        atexit.register(self.flush)
+
+    def mark_dirty(self):
+        """Record one change and schedule a write (or write it now if interval <= 0)"""
+        with self.lock:
+            self.pending += 1
+            if self.interval > 0:
+                if self.pending >= self.max_pending:
+                    self._schedule(0)
+                elif self._timer is None:
+                    self._schedule(self.interval)
+        if self.interval <= 0:
+            self.flush()
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            if delay > 0:
+                return
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self) -> bool:
+        """Write the document now if it has unsaved changes; returns whether it wrote"""
+        with self._flush_lock:
+            with self.lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self.pending:
+                    return False
+                text = json.dumps(self.get_data(), indent=self.indent, ensure_ascii=False)
+                pending, self.pending = self.pending, 0
+
+            try:
+                write_text_atomic(self.path, text)
+            except OSError as e:
+                logger.error(f"Writing {self.path} failed, will retry: {e}")
+                with self.lock:
+                    self.pending += pending
+                    self._schedule(max(self.interval, RETRY_DELAY))
+                return False
+            self.flushes += 1
+            logger.debug(f"Wrote {self.path.name} ({pending} changes)")
+            return True
@@ -0,0 +1,67 @@
+"""
+In-memory ranking of players for the GSL bot leaderboard
+Keeps every user in a sorted list keyed by (-total_points, user_id), so a
+score change is a remove + insert in O(log U), the top N is a slice, and a
+user's global rank or percentile is a binary search, also O(log U).
+GameDatabase builds it from the storage backend at startup.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from sortedcontainers import SortedList
+
+
+class Leaderboard:
+    """Users ordered by total points (highest first, ties by user id)"""
+
+    def __init__(self, scores: Iterable[Tuple[int, int]] = ()):
+        self._keys: Dict[int, Tuple[int, int]] = {
+            user_id: (-points, user_id) for user_id, points in scores
+        }
+        self._ranked = SortedList(self._keys.values())
+
+    def __len__(self) -> int:
+        return len(self._ranked)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._keys
+
+    def update(self, user_id: int, points: int):
+        """Set a user's total points (adds unknown users)"""
+        key = (-points, user_id)
+        old_key = self._keys.get(user_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self._ranked.remove(old_key)
+        self._ranked.add(key)
+        self._keys[user_id] = key
+
+    def remove(self, user_id: int):
+        key = self._keys.pop(user_id, None)
+        if key is not None:
+            self._ranked.remove(key)
+
+    def top(self, limit: int) -> List[int]:
+        """User ids of the `limit` highest scores"""
+        return [user_id for _, user_id in self._ranked.islice(0, limit)]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1-based global rank: 1 + users with more points (equal points share a rank)"""
+        key = self._keys.get(user_id)
+        if key is None:
+            return None
+        return self._ranked.bisect_left((key[0],)) + 1
+
+    def percentile(self, user_id: int) -> Optional[float]:
+        """Percentage of players with fewer points than this user (0-100)"""
+        key = self._keys.get(user_id)
+        if key is None:
+            return None
+        below = len(self._ranked) - self._ranked.bisect_left((key[0] + 1,))
+        return 100.0 * below / len(self._ranked)
+
+    def in_top(self, user_id: int, limit: int) -> bool:
+        """Whether a user is among the `limit` highest scores"""
+        key = self._keys.get(user_id)
+        if key is None or limit <= 0:
+            return False
+        return len(self._ranked) <= limit or key <= self._ranked[limit - 1]
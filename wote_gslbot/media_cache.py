@@ -0,0 +1,344 @@
+"""
+Telegram file_id cache for GSL sign media
+Uploads each video/image once and reuses the file_id Telegram returns
+"""
+import json
+import time
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from telegram import InputMediaPhoto, InputMediaVideo
+from telegram.error import BadRequest
+from config import (
+    MEDIA_CACHE_FILE, MEDIA_PREWARM_CONCURRENCY, MEDIA_CACHE_FLUSH_INTERVAL, MEDIA_CACHE_FLUSH_MAX_PENDING
+)
+from json_store import WriteBehindJson
+from media_io import run_io, read_media
+from media_manifest import media_manifest
+from services import LazyService
+from transcode import select_media_path
+
+logger = logging.getLogger(__name__)
+
+class MediaCache:
+    """
+    Maps media content (SHA-256 from the media manifest) to Telegram file_ids
+    Uploads finish on several I/O threads at once, so `entries` is only
+    changed under `lock`; the file is written behind (see WriteBehindJson).
+    """
+
+    def __init__(self, cache_file: Path = MEDIA_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = self._load_cache()  # sha256 -> {'file_id', 'media_type'}
+        self.lock = threading.RLock()
+        self.writer = WriteBehindJson(
+            cache_file, lambda: self.entries, MEDIA_CACHE_FLUSH_INTERVAL, MEDIA_CACHE_FLUSH_MAX_PENDING, self.lock
+        )
+
+    def _load_cache(self) -> Dict:
+        """Load cached file_ids from JSON"""
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable media cache {self.cache_file}: {e}")
+                return {}
+
+            # Older caches were keyed by path with the hash inside the entry
+            return {
+                entry.get('sha256', key): {'file_id': entry['file_id'], 'media_type': entry['media_type']}
+                for key, entry in entries.items()
+            }
+        return {}
+
+    def flush(self) -> bool:
+        """Write pending file_ids now"""
+        return self.writer.flush()
+
+    def content_hash(self, media_path: Path) -> str:
+        """SHA-256 of a media file, only re-hashed when mtime or size change"""
+        return media_manifest.content_hash(media_path)
+
+    def get_file_id(self, media_path: Path) -> Optional[str]:
+        """Return the file_id of any earlier upload of this exact content"""
+        entry = self.entries.get(self.content_hash(media_path))
+        return entry.get('file_id') if entry else None
+
+    def remember(self, media_path: Path, file_id: str, media_type: str):
+        """Record the file_id Telegram returned for an upload"""
+        sha256 = self.content_hash(media_path)
+        with self.lock:
+            self.entries[sha256] = {
+                'file_id': file_id,
+                'media_type': media_type
+            }
+        self.writer.mark_dirty()
+
+    def get_file_id_for_entry(self, info: Dict) -> Optional[str]:
+        """
+        file_id of any uploaded version of a dictionary entry (original or a
+        variant) using only hashes already in memory - no disk access
+        """
+        paths = [info['path']] + [
+            variant['path'] for name, variant in info.get('variants', {}).items() if name != 'preview'
+        ]
+        for path in paths:
+            record = media_manifest.files.get(str(Path(path)))
+            entry = self.entries.get(record['sha256']) if record else None
+            if entry:
+                return entry['file_id']
+        return None
+
+    def invalidate(self, media_path: Path):
+        """Forget a file_id that Telegram no longer accepts"""
+        self.forget(self.content_hash(media_path))
+
+    def forget(self, sha256: str):
+        """Drop the file_id of some content"""
+        with self.lock:
+            removed = self.entries.pop(sha256, None) is not None
+        if removed:
+            self.writer.mark_dirty()
+
+
+def _media_field(media_type: str) -> str:
+    """Keyword used by send_photo / send_video for the media argument"""
+    return 'photo' if media_type == 'image' else 'video'
+
+
+def _extract_file_id(message, media_type: str) -> Optional[str]:
+    """Pull the file_id out of the Message Telegram returned"""
+    if media_type == 'image':
+        return message.photo[-1].file_id if message.photo else None
+
+    # Telegram may re-classify short silent clips as animations
+    for attachment in (message.video, message.animation, message.document):
+        if attachment:
+            return attachment.file_id
+    return None
+
+
+# sha256 -> lock held while that content is being uploaded
+_upload_locks: Dict[str, asyncio.Lock] = {}
+
+
+def forget_media(sha256: str):
+    """
+    Drop the file_id and upload lock of content whose file was deleted
+    (e.g. a pruned phrase clip). Safe from worker threads: single dict pops.
+    """
+    media_cache.forget(sha256)
+    _upload_locks.pop(sha256, None)
+
+
+async def _send_cached(send, field: str, media_path: Path, **kwargs):
+    """Send by cached file_id; returns None if there is no usable id"""
+    file_id = await run_io(media_cache.get_file_id, media_path)
+    if not file_id:
+        return None
+
+    try:
+        return await send(**{field: file_id}, **kwargs)
+    except BadRequest as e:
+        # Stored id expired or belongs to another bot token - re-upload
+        logger.warning(f"Cached file_id rejected for {media_path}: {e}")
+        await run_io(media_cache.invalidate, media_path)
+        return None
+
+
+async def _upload_thumbnail(thumbnail: Optional[Path]) -> Dict:
+    """thumbnail= kwarg for an upload; Telegram ignores thumbnails on file_id sends"""
+    if thumbnail and await run_io(Path(thumbnail).exists):
+        return {'thumbnail': await read_media(Path(thumbnail))}
+    return {}
+
+
+async def send_media(send, media_path: Path, media_type: str, thumbnail: Optional[Path] = None, **kwargs):
+    """
+    Send a sign photo/video through `send` (e.g. context.bot.send_video)
+    Reuses the cached file_id when possible, otherwise uploads the file
+    (with `thumbnail` as its poster image). Concurrent sends of the same
+    content share a single upload.
+    """
+    field = _media_field(media_type)
+
+    message = await _send_cached(send, field, media_path, **kwargs)
+    if message:
+        return message
+
+    sha256 = await run_io(media_cache.content_hash, media_path)
+    async with _upload_locks.setdefault(sha256, asyncio.Lock()):
+        # Another task may have finished uploading this file while we waited
+        message = await _send_cached(send, field, media_path, **kwargs)
+        if message:
+            return message
+
+        # File is read in the I/O pool and uploaded from memory
+        media_bytes = await read_media(media_path)
+        message = await send(
+            **{field: media_bytes}, filename=media_path.name, **await _upload_thumbnail(thumbnail), **kwargs
+        )
+
+        new_file_id = _extract_file_id(message, media_type)
+        if new_file_id:
+            await run_io(media_cache.remember, media_path, new_file_id, media_type)
+
+    return message
+
+
+async def _rejected_file_ids(bot, cached: List[Tuple[int, str]]) -> List[int]:
+    """Indexes of cached file_ids Telegram no longer accepts, checked with getFile (which sends nothing)"""
+    async def rejected(file_id: str) -> bool:
+        try:
+            await bot.get_file(file_id)
+            return False
+        except BadRequest:
+            return True
+
+    results = await asyncio.gather(*(rejected(file_id) for _, file_id in cached))
+    return [idx for (idx, _), bad in zip(cached, results) if bad]
+
+
+async def send_media_group(bot, chat_id: int, items: List[Tuple[Path, str, str, Dict]], **kwargs):
+    """
+    Send up to 10 (media_path, media_type, caption, options) items as one album
+    `options` are InputMediaVideo extras (duration, width, height, thumbnail...).
+    Cached file_ids are used where they exist; new uploads are recorded.
+    """
+    if len(items) == 1:
+        media_path, media_type, caption, options = items[0]
+        send = bot.send_photo if media_type == 'image' else bot.send_video
+        return [await send_media(send, media_path, media_type, chat_id=chat_id, caption=caption, **options, **kwargs)]
+
+    force_upload = set()  # indexes uploaded even if a file_id is cached
+    while True:
+        media = []
+        uploaded = []
+        cached = []  # (index, file_id) sent by id
+        for idx, (media_path, media_type, caption, options) in enumerate(items):
+            file_id = None if idx in force_upload else await run_io(media_cache.get_file_id, media_path)
+            input_media = InputMediaPhoto if media_type == 'image' else InputMediaVideo
+            options = dict(options)
+            thumbnail = options.pop('thumbnail', None)
+            if file_id:
+                cached.append((idx, file_id))
+                media.append(input_media(file_id, caption=caption, **options))
+            else:
+                uploaded.append(idx)
+                media_bytes = await read_media(media_path)
+                media.append(input_media(
+                    media_bytes, caption=caption, filename=media_path.name,
+                    **await _upload_thumbnail(thumbnail), **options
+                ))
+
+        try:
+            messages = await bot.send_media_group(chat_id=chat_id, media=media, **kwargs)
+        except BadRequest as e:
+            if not cached:
+                raise
+            # Telegram does not say which item failed: re-upload only the ids getFile rejects
+            logger.warning(f"Cached file_id rejected in media group: {e}")
+            rejected = await _rejected_file_ids(bot, cached)
+            for idx in rejected:
+                await run_io(media_cache.invalidate, items[idx][0])
+            # If getFile accepts every id (e.g. a photo id in a video slot), upload them all this once
+            force_upload.update(rejected or [idx for idx, _ in cached])
+            continue
+
+        for idx in uploaded:
+            media_path, media_type, _, _ = items[idx]
+            new_file_id = _extract_file_id(messages[idx], media_type)
+            if new_file_id:
+                await run_io(media_cache.remember, media_path, new_file_id, media_type)
+
+        return messages
+
+
+# ========================
+# PRE-WARM
+# ========================
+
+def _pending_uploads(dictionary: Dict) -> Tuple[int, List[Tuple[Path, str]]]:
+    """
+    Return (unique media count, one entry per blob that still has no cached file_id)
+    Each entry is the file the bot actually sends (select_media_path), so the
+    uploaded file_ids are the ones later sends look up.
+    """
+    seen = set()
+    pending = []
+    for items in dictionary.values():
+        for info in items.values():
+            media_path = select_media_path(info)
+            if not media_path.exists():
+                continue
+
+            # Identical files share one upload
+            sha256 = media_cache.content_hash(media_path)
+            if sha256 in seen:
+                continue
+            seen.add(sha256)
+
+            if sha256 not in media_cache.entries:
+                pending.append((media_path, info.get('type', 'video')))
+    return len(seen), pending
+
+
+def format_prewarm_stats(stats: Dict) -> str:
+    """Human readable progress line for logs and admin messages"""
+    elapsed = max(stats['elapsed'], 1e-6)
+    done = stats['uploaded'] + stats['failed']
+    return (
+        f"{done}/{stats['pending']} uploaded ({stats['cached']} already cached, "
+        f"{stats['failed']} failed) - {stats['uploaded'] / elapsed:.2f} files/s, "
+        f"{stats['bytes'] / elapsed / (1024 * 1024):.2f} MB/s"
+    )
+
+
+async def prewarm_media(bot, chat_id: int, dictionary: Dict,
+                        concurrency: int = MEDIA_PREWARM_CONCURRENCY, on_progress=None) -> Dict:
+    """
+    Upload every dictionary entry without a cached file_id to `chat_id`
+    File_ids are written behind every MEDIA_CACHE_FLUSH_INTERVAL seconds (and
+    at exit), so an interrupted run resumes where it stopped. `on_progress(stats)` is awaited after every file.
+    """
+    total, pending = await run_io(_pending_uploads, dictionary)
+    stats = {
+        'total': total,
+        'cached': total - len(pending),
+        'pending': len(pending),
+        'uploaded': 0,
+        'failed': 0,
+        'bytes': 0,
+        'elapsed': 0.0
+    }
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def upload(media_path: Path, media_type: str):
+        async with semaphore:
+            send = bot.send_photo if media_type == 'image' else bot.send_video
+            try:
+                await send_media(send, media_path, media_type, chat_id=chat_id, disable_notification=True)
+                stats['uploaded'] += 1
+                stats['bytes'] += (await run_io(media_path.stat)).st_size
+            except Exception as e:
+                stats['failed'] += 1
+                logger.error(f"Pre-warm upload failed for {media_path}: {e}")
+
+            stats['elapsed'] = time.monotonic() - started
+            if on_progress:
+                await on_progress(stats)
+
+    logger.info(f"Media pre-warm: {len(pending)} of {total} files need uploading")
+    await asyncio.gather(*(upload(path, media_type) for path, media_type in pending))
+
+    stats['elapsed'] = time.monotonic() - started
+    logger.info(f"Media pre-warm finished: {format_prewarm_stats(stats)}")
+    return stats
+
+
+# Singleton instance (loaded on first use or by services.start_services)
+media_cache = LazyService('media cache', MediaCache)
@@ -0,0 +1,112 @@
+"""
+Non-blocking media file access for the GSL bot
+Disk reads, stats and hashing run in a small thread pool so slow disks or
+network volumes never stall the asyncio event loop.
+"""
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from config import MEDIA_IO_THREADS, MEDIA_BYTES_CACHE_SIZE
+
+_executor = ThreadPoolExecutor(max_workers=MEDIA_IO_THREADS, thread_name_prefix='media-io')
+
+
+class MediaBytesCache:
+    """Byte-budgeted LRU of media file contents, validated against mtime/size on every hit"""
+
+    def __init__(self, max_bytes: int = MEDIA_BYTES_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # path -> ((mtime_ns, size), bytes)
+        self._lock = threading.Lock()  # used from the I/O thread pool
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, signature) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry:
+                # File changed on disk since it was cached
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, signature, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (signature, data)
+            self.current_bytes += len(data)
+
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, data = self._entries.pop(key)
+        self.current_bytes -= len(data)
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+def _read_file(media_path: Path) -> bytes:
+    """Read a whole media file (the upload needs it as one bytes object)"""
+    with open(media_path, 'rb') as f:
+        return f.read()
+
+
+def _read_file_cached(media_path: Path) -> bytes:
+    """Serve a media file from the LRU if it is unchanged on disk, else read and cache it"""
+    stat = media_path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = str(media_path)
+
+    data = media_bytes_cache.get(key, signature)
+    if data is None:
+        data = _read_file(media_path)
+        media_bytes_cache.put(key, signature, data)
+    return data
+
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking filesystem call in the media I/O pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def read_media(media_path: Path) -> bytes:
+    """Read a media file without blocking the event loop (served from the LRU when hot)"""
+    return await run_io(_read_file_cached, media_path)
+
+
+async def media_exists(media_path: Path) -> bool:
+    """Path.exists() without blocking the event loop"""
+    return await run_io(media_path.exists)
+
+
+# Singleton instance
+media_bytes_cache = MediaBytesCache()
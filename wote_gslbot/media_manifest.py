@@ -0,0 +1,280 @@
+"""
+Content-addressed manifest of GSL sign media
+Records hash, size, mime type and video metadata (duration, dimensions,
+thumbnail) of every media file and groups identical files into one blob
+that many words point at.
+"""
+import json
+import shutil
+import hashlib
+import logging
+import mimetypes
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from json_store import write_json_atomic
+from services import LazyService
+from config import (
+    MEDIA_MANIFEST_FILE, THUMBNAILS_DIR, FFMPEG_BIN, FFPROBE_BIN, SUPPORTED_VIDEO_FORMATS
+)
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Probed fields copied onto dictionary entries
+VIDEO_METADATA_KEYS = ('duration', 'width', 'height', 'thumbnail')
+
+
+def file_sha256(media_path: Path) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(media_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _probe_video(media_path: Path) -> Dict:
+    """Duration (s), width and height of a clip via ffprobe; empty if unavailable"""
+    if media_path.suffix.lower() not in SUPPORTED_VIDEO_FORMATS or not shutil.which(FFPROBE_BIN):
+        return {}
+    try:
+        output = subprocess.run(
+            [FFPROBE_BIN, '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'stream=width,height:format=duration', '-of', 'json', str(media_path)],
+            capture_output=True, text=True, check=True, timeout=30
+        ).stdout
+        probe = json.loads(output)
+    except (subprocess.SubprocessError, ValueError, OSError) as e:
+        logger.warning(f"ffprobe failed for {media_path}: {e}")
+        return {}
+
+    stream = (probe.get('streams') or [{}])[0]
+    duration = probe.get('format', {}).get('duration')
+    return {
+        'duration': round(float(duration), 3) if duration else None,
+        'width': stream.get('width'),
+        'height': stream.get('height')
+    }
+
+
+def _make_thumbnail(media_path: Path, sha256: str) -> Optional[str]:
+    """
+    Extract a 320px JPEG poster frame (Telegram's thumbnail limits)
+    Thumbnails are content addressed, so each blob is rendered once
+    """
+    if media_path.suffix.lower() not in SUPPORTED_VIDEO_FORMATS or not shutil.which(FFMPEG_BIN):
+        return None
+
+    thumbnail = THUMBNAILS_DIR / f"{sha256}.jpg"
+    if thumbnail.exists():
+        return str(thumbnail)
+
+    THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        subprocess.run(
+            [FFMPEG_BIN, '-y', '-loglevel', 'error', '-ss', '0.5', '-i', str(media_path),
+             '-frames:v', '1', '-vf', "scale='min(320,iw)':-2", '-q:v', '5', str(thumbnail)],
+            check=True, timeout=60
+        )
+    except (subprocess.SubprocessError, OSError) as e:
+        logger.warning(f"Thumbnail extraction failed for {media_path}: {e}")
+        return None
+    return str(thumbnail) if thumbnail.exists() else None
+
+
+def _probe_file(media_path: Path, probe: bool = True) -> Dict:
+    """
+    Build a manifest record for one file (runs in a worker thread)
+    With probe=False only the hash is computed: no ffprobe, no thumbnail.
+    """
+    stat = media_path.stat()
+    sha256 = file_sha256(media_path)
+    video = _probe_video(media_path) if probe else {}
+    return {
+        'sha256': sha256,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'mime_type': mimetypes.guess_type(media_path.name)[0] or 'application/octet-stream',
+        'duration': video.get('duration'),
+        'width': video.get('width'),
+        'height': video.get('height'),
+        'thumbnail': _make_thumbnail(media_path, sha256) if video else None
+    }
+
+
+def _link_entry(blobs: Dict, category: str, word: str, info: Dict, record: Dict) -> bool:
+    """Point a dictionary entry at its blob in `blobs`; returns whether the entry changed"""
+    before = [info.get(key) for key in ('blob',) + VIDEO_METADATA_KEYS]
+
+    sha256 = record['sha256']
+    info['blob'] = sha256
+
+    # Cache playback metadata on the entry so sends can pass it
+    for key in VIDEO_METADATA_KEYS:
+        if record.get(key) is not None:
+            info[key] = record[key]
+        else:
+            info.pop(key, None)
+
+    blob = blobs.setdefault(sha256, {
+        'path': info['path'],
+        'size': record['size'],
+        'mime_type': record['mime_type'],
+        'duration': record['duration'],
+        'words': []
+    })
+    label = f"{category}/{word}"
+    if label not in blob['words']:
+        blob['words'].append(label)
+    return [info.get(key) for key in ('blob',) + VIDEO_METADATA_KEYS] != before
+
+
+class MediaManifest:
+    """Maps media paths to content records and content hashes to blobs"""
+
+    def __init__(self, manifest_file: Path = MEDIA_MANIFEST_FILE):
+        self.manifest_file = manifest_file
+        manifest = self._load_manifest()
+        self.files = manifest.get('files', {})  # path -> record
+        self.blobs = manifest.get('blobs', {})  # sha256 -> {'path', 'size', ..., 'words'}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def _load_manifest(self) -> Dict:
+        """Load manifest from JSON"""
+        if self.manifest_file.exists():
+            try:
+                with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable media manifest {self.manifest_file}: {e}")
+        return {}
+
+    def _save_manifest(self):
+        """Save manifest to JSON (caller holds the lock)"""
+        write_json_atomic(self.manifest_file, {'files': self.files, 'blobs': self.blobs})
+        self._dirty = False
+
+    def _is_current(self, key: str, stat) -> bool:
+        record = self.files.get(key)
+        return bool(record) and record['mtime_ns'] == stat.st_mtime_ns and record['size'] == stat.st_size
+
+    def content_hash(self, media_path: Path, probe: bool = True) -> str:
+        """
+        SHA-256 of a media file, only re-hashed when its mtime or size changed
+        probe=False skips ffprobe and the thumbnail (e.g. stitched phrase clips)
+        """
+        key = str(media_path)
+        stat = media_path.stat()
+        if self._is_current(key, stat):
+            return self.files[key]['sha256']
+
+        record = _probe_file(media_path, probe)
+        with self._lock:
+            self.files[key] = record
+            self._dirty = True
+        return record['sha256']
+
+    def forget(self, media_path: Path) -> Optional[str]:
+        """Drop the record of a deleted file; returns its content hash if it had one"""
+        with self._lock:
+            record = self.files.pop(str(media_path), None)
+            if record is None:
+                return None
+            self._dirty = True
+        return record['sha256']
+
+    def get_blob(self, sha256: str) -> Optional[Dict]:
+        return self.blobs.get(sha256)
+
+    def build(self, dictionary: Dict, workers: int = None) -> Dict:
+        """
+        Incrementally refresh the manifest for every dictionary entry
+        Changed or new files are hashed/probed in parallel; each entry gets
+        a 'blob' field with its content hash. Returns build statistics,
+        where 'updated_entries' counts dictionary entries that were modified.
+        """
+        paths = {}
+        for items in dictionary.values():
+            for info in items.values():
+                media_path = Path(info['path'])
+                try:
+                    paths[str(media_path)] = media_path.stat()
+                except OSError:
+                    continue
+
+        stale = [key for key, stat in paths.items() if not self._is_current(key, stat)]
+        probed = {}
+        if stale:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                probed = dict(zip(stale, pool.map(lambda key: _probe_file(Path(key)), stale)))
+
+        # Records that content_hash() made for variants and phrase clips stay while their file exists
+        with self._lock:
+            unlisted = [key for key in self.files if key not in paths]
+        missing = [key for key in unlisted if not Path(key).exists()]
+
+        # content_hash() adds records from I/O threads, so the manifest is only changed under the lock
+        with self._lock:
+            self.files.update(probed)
+            removed = [key for key in missing if self.files.pop(key, None) is not None]
+
+            blobs = {}
+            updated_entries = 0
+            for category, items in dictionary.items():
+                for word, info in items.items():
+                    record = self.files.get(str(Path(info['path'])))
+                    if not record:
+                        if info.pop('blob', None) is not None:
+                            updated_entries += 1
+                        continue
+
+                    if _link_entry(blobs, category, word, info, record):
+                        updated_entries += 1
+
+            changed = bool(stale or removed) or blobs != self.blobs or self._dirty
+            self.blobs = blobs
+            if changed:
+                self._save_manifest()
+
+        stats = {
+            'files': len(paths),
+            'blobs': len(blobs),
+            'duplicates': len(paths) - len(blobs),
+            'rehashed': len(stale),
+            'removed': len(removed),
+            'updated_entries': updated_entries
+        }
+        if stale or removed:
+            logger.info(f"Media manifest: {stats}")
+        return stats
+
+    def link_entry(self, category: str, word: str, info: Dict):
+        """
+        Hash/probe one new entry's file and link it to its blob, without
+        touching the rest of the dictionary (VideoDatabase.add_video). A blob
+        the word pointed at before keeps listing it until the next build().
+        """
+        media_path = Path(info['path'])
+        try:
+            self.content_hash(media_path)
+        except OSError:
+            return
+
+        with self._lock:
+            record = self.files.get(str(media_path))
+            if record:
+                _link_entry(self.blobs, category, word, info, record)
+                self._save_manifest()
+
+    def duplicate_groups(self) -> List[List[str]]:
+        """Words that share identical media content"""
+        return [blob['words'] for blob in self.blobs.values() if len(blob['words']) > 1]
+
+
+# Singleton instance (loaded on first use or by services.start_services)
+media_manifest = LazyService('media manifest', MediaManifest)
@@ -0,0 +1,82 @@
+"""
+Picks up new sign media without a bot restart
+Polls the category directories every MEDIA_WATCH_INTERVAL seconds (a stat of
+each directory when nothing changed). If the optional `watchdog` package is
+installed, filesystem events trigger a rescan immediately as well.
+"""
+import asyncio
+import logging
+from typing import Optional
+from config import CATEGORIES, MEDIA_WATCH_INTERVAL
+from media_io import run_io
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# Wait this long after a filesystem event so copies can finish
+EVENT_DEBOUNCE = 2.0
+
+
+class MediaWatcher:
+    """Runs VideoDatabase.rescan() in the I/O pool when the media directories change"""
+
+    def __init__(self, database, interval: float = MEDIA_WATCH_INTERVAL):
+        self.database = database
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._observer = None
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+        if Observer is not None:
+            loop = asyncio.get_running_loop()
+            wakeup = self._wakeup
+
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    loop.call_soon_threadsafe(wakeup.set)
+
+            self._observer = Observer()
+            for category_dir in CATEGORIES.values():
+                if category_dir.exists():
+                    self._observer.schedule(Handler(), str(category_dir), recursive=False)
+            self._observer.start()
+            logger.info("Media watcher: using filesystem events")
+        logger.info(f"Media watcher: polling every {self.interval:g}s")
+
+    async def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            await run_io(self._observer.join)
+            self._observer = None
+
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+                await asyncio.sleep(EVENT_DEBOUNCE)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                if await run_io(self.database.rescan):
+                    logger.info("Media watcher: dictionary refreshed")
+            except Exception as e:
+                logger.error(f"Media watcher rescan failed: {e}")
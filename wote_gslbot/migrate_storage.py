@@ -0,0 +1,58 @@
+"""
+Copy the JSON dictionary and game data into the SQLite backend
+Run once before setting STORAGE_BACKEND=sqlite:
+
+    python migrate_storage.py [--sqlite-file data/gsl_bot.sqlite3] [--force]
+
+The JSON files are only read, so switching back to STORAGE_BACKEND=json
+keeps working with the data as it was at migration time.
+"""
+import argparse
+from pathlib import Path
+from config import DICTIONARY_FILE, SQLITE_FILE
+from game_database import GAME_DATA_FILE
+from game_history import GameHistory
+from storage import JsonDictionaryStore, JsonGameStore, SqliteDictionaryStore, SqliteGameStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import dictionary.json and game_data.json into SQLite')
+    parser.add_argument('--sqlite-file', type=Path, default=SQLITE_FILE, help=f'Target database (default: {SQLITE_FILE})')
+    parser.add_argument('--dictionary', type=Path, default=DICTIONARY_FILE, help='Source dictionary JSON')
+    parser.add_argument('--game-data', type=Path, default=GAME_DATA_FILE, help='Source game data JSON')
+    parser.add_argument('--force', action='store_true', help='Replace data already in the database')
+    args = parser.parse_args()
+
+    signs = SqliteDictionaryStore(args.sqlite_file)
+    users = SqliteGameStore(args.sqlite_file)
+
+    if (signs.exists() or users.count_users()) and not args.force:
+        print(f"❌ {args.sqlite_file} already holds data. Use --force to replace it.")
+        exit(1)
+
+    print(f"🗄️ Migrating JSON data into {args.sqlite_file}...")
+
+    dictionary = JsonDictionaryStore(args.dictionary).load()
+    signs.clear()
+    signs.save(dictionary, previous={})
+    total_signs = sum(len(items) for items in dictionary.values())
+    print(f"   📚 {total_signs} signs in {len(dictionary)} categories")
+
+    game_data = JsonGameStore(args.game_data).game_data
+    users.clear()
+    users.put_users(list(game_data['users'].values()))
+    print(f"   👥 {len(game_data['users'])} users")
+
+    # Finished games live in the game history log with either backend
+    history = GameHistory()
+    legacy = game_data.get('game_history', [])
+    if legacy and not history.count():
+        history.extend(legacy)
+        print(f"   🎮 {len(legacy)} games moved to the game history log")
+    history.close()
+
+    print("\n✅ Done. Set STORAGE_BACKEND=sqlite to use it.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Sentence-to-sign translation for the GSL bot
+Splits text into the longest known (multi-word) signs, fingerspells unknown
+words letter by letter, and stitches the clips into one video with ffmpeg.
+Stitched clips are cached on disk, keyed by the sequence of clip contents,
+so common phrases are only encoded once.
+"""
+import os
+import re
+import time
+import shutil
+import asyncio
+import hashlib
+import logging
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    FFMPEG_BIN, STITCHED_DIR, STITCH_WORKERS, STITCHED_CACHE_MAX_FILES, PHRASE_MAX_CLIPS,
+    SUPPORTED_IMAGE_FORMATS
+)
+from media_cache import forget_media
+from media_io import run_io
+from media_manifest import media_manifest
+from search_index import normalize_word
+from transcode import select_media_path
+
+logger = logging.getLogger(__name__)
+
+# ffmpeg does the encoding in its own process; threads just wait on it
+_executor = ThreadPoolExecutor(max_workers=STITCH_WORKERS, thread_name_prefix='stitch')
+
+# Output geometry of stitched clips (sources are letterboxed into it)
+STITCH_SIZE = 480
+STITCH_FPS = 25
+IMAGE_SECONDS = 1.5  # how long a still sign (e.g. a letter image) is shown
+
+# cache key -> Future of the stitch in progress, so identical requests share one encode
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def segment_phrase(text: str, dictionary) -> Dict:
+    """
+    Split `text` into signs using a DictionarySnapshot
+    Known phrases win over single words (longest match first); unknown words
+    are fingerspelled from the alphabets/numbers categories.
+    Returns {'segments': [{'word', 'info', 'spelled'}], 'missing': [characters]}
+    """
+    # Punctuation separates words; apostrophes are dropped ("don't" -> DONT)
+    words = normalize_word(re.sub(r"[^\w\s'-]", ' ', text).replace("'", '')).split()
+    segments = []
+    missing = []
+
+    # Every word run that could be a sign, resolved in one batch lookup
+    found = dictionary.search_many(list({
+        ' '.join(words[start:start + length])
+        for start in range(len(words))
+        for length in range(1, min(dictionary.max_phrase_words, len(words) - start) + 1)
+    }))
+
+    i = 0
+    while i < len(words):
+        for length in range(min(dictionary.max_phrase_words, len(words) - i), 0, -1):
+            phrase = ' '.join(words[i:i + length])
+            info = found[phrase]
+            if info:
+                segments.append({'word': phrase, 'info': info, 'spelled': False})
+                i += length
+                break
+        else:
+            for char in words[i]:
+                category = 'numbers' if char.isdigit() else 'alphabets'
+                info = dictionary.get_category(category).get(char)
+                if info:
+                    segments.append({'word': char, 'info': info, 'spelled': True})
+                elif char.isalnum():
+                    missing.append(char)
+            i += 1
+
+    return {'segments': segments, 'missing': missing}
+
+
+def describe_segments(segments: List[Dict]) -> str:
+    """'GOOD MORNING K-O-F-I' style caption: fingerspelled runs are joined with dashes"""
+    parts = []
+    spelling = []
+    for segment in segments:
+        if segment['spelled']:
+            spelling.append(segment['word'])
+            continue
+        if spelling:
+            parts.append('-'.join(spelling))
+            spelling = []
+        parts.append(segment['word'])
+    if spelling:
+        parts.append('-'.join(spelling))
+    return ' '.join(parts)
+
+
+def _clip_inputs(segments: List[Dict]) -> List[Path]:
+    """Files to stitch, in order (transcoded variants where the original is too big)"""
+    return [select_media_path(segment['info']) for segment in segments]
+
+
+def stitch_key(inputs: List[Path]) -> str:
+    """Cache key: the content hashes of the clips, in order"""
+    digest = hashlib.sha256()
+    for media_path in inputs:
+        digest.update(media_manifest.content_hash(media_path).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _stitch(inputs: List[Path], output: Path):
+    """Blocking: letterbox every clip to one size/fps and concatenate them with ffmpeg"""
+    args = [FFMPEG_BIN, '-y', '-loglevel', 'error']
+    filters = []
+    for idx, media_path in enumerate(inputs):
+        if media_path.suffix.lower() in SUPPORTED_IMAGE_FORMATS:
+            args += ['-loop', '1', '-t', str(IMAGE_SECONDS)]
+        args += ['-i', str(media_path)]
+        filters.append(
+            f"[{idx}:v]scale={STITCH_SIZE}:{STITCH_SIZE}:force_original_aspect_ratio=decrease,"
+            f"pad={STITCH_SIZE}:{STITCH_SIZE}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={STITCH_FPS},format=yuv420p[v{idx}]"
+        )
+    streams = ''.join(f"[v{idx}]" for idx in range(len(inputs)))
+    filters.append(f"{streams}concat=n={len(inputs)}:v=1:a=0[out]")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_output = output.with_name(output.stem + '.tmp.mp4')
+    subprocess.run(
+        args + ['-filter_complex', ';'.join(filters), '-map', '[out]',
+                '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '30', '-an',
+                '-movflags', '+faststart', str(tmp_output)],
+        check=True, timeout=120
+    )
+    os.replace(tmp_output, output)
+    # Hashed here, off the send path; the clip needs no ffprobe or poster frame
+    media_manifest.content_hash(output, probe=False)
+    _prune_cache()
+
+
+def _prune_cache():
+    """
+    Keep at most STITCHED_CACHE_MAX_FILES clips, dropping the least recently used
+    Their manifest records, cached file_ids and upload locks go with them.
+    """
+    clips = sorted(STITCHED_DIR.glob('*.mp4'), key=lambda path: path.stat().st_atime)
+    for stale in clips[:max(0, len(clips) - STITCHED_CACHE_MAX_FILES)]:
+        stale.unlink(missing_ok=True)
+        sha256 = media_manifest.forget(stale)
+        if sha256:
+            forget_media(sha256)
+
+
+def _touch_cached(output: Path) -> bool:
+    """True if a stitched clip is cached (and mark it as recently used)"""
+    try:
+        stat = output.stat()
+    except OSError:
+        return False
+    # Recency lives in atime: changing mtime would make the manifest re-hash the clip
+    os.utime(output, ns=(time.time_ns(), stat.st_mtime_ns))
+    media_manifest.content_hash(output, probe=False)
+    return True
+
+
+def can_stitch() -> bool:
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+async def get_phrase_clip(segments: List[Dict]) -> Optional[Path]:
+    """
+    One video for the whole phrase, from the cache or stitched in the worker pool
+    Cache hits never wait for running encodes. Returns None if there is
+    nothing to stitch, a clip is missing or ffmpeg is unavailable.
+    """
+    if not segments or len(segments) > PHRASE_MAX_CLIPS or not can_stitch():
+        return None
+
+    inputs = await run_io(_clip_inputs, segments)
+    if not all(await run_io(lambda: [path.exists() for path in inputs])):
+        return None
+
+    key = await run_io(stitch_key, inputs)
+    output = STITCHED_DIR / f"{key}.mp4"
+    if await run_io(_touch_cached, output):
+        return output
+
+    future = _in_flight.get(key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = asyncio.ensure_future(loop.run_in_executor(_executor, _stitch, inputs, output))
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+    try:
+        await asyncio.shield(future)
+    except (subprocess.SubprocessError, OSError) as e:
+        logger.error(f"Stitching phrase failed: {e}")
+        return None
+    return output
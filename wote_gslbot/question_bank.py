@@ -0,0 +1,100 @@
+"""
+Precomputed quiz material for solo practice and multiplayer games
+For each category the bank keeps a shuffled pool of words with their
+dictionary entries already resolved. Question words are dealt from the
+pool (reshuffled when it runs out) and distractors are drawn by random
+index, so starting a game costs O(questions) whatever the dictionary size.
+The bank is rebuilt whenever VideoDatabase publishes a new dictionary version.
+"""
+import random
+import logging
+import threading
+from typing import Dict, List
+from database import db, DictionarySnapshot
+from services import LazyService
+
+logger = logging.getLogger(__name__)
+
+
+class WordPool:
+    """One category's words in shuffled order, with their entries"""
+
+    def __init__(self, words: List[str], infos: Dict[str, Dict], rng: random.Random):
+        self.words = words
+        self.infos = infos  # word -> info (the category's dictionary entries)
+        self._rng = rng
+        self._deck = list(words)
+        self._rng.shuffle(self._deck)
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def deal(self, count: int) -> List[str]:
+        """`count` distinct words, continuing through the shuffled deck"""
+        if self._cursor + count > len(self._deck):
+            self._rng.shuffle(self._deck)
+            self._cursor = 0
+        dealt = self._deck[self._cursor:self._cursor + count]
+        self._cursor += count
+        return dealt
+
+    def distractors(self, word: str, count: int) -> List[str]:
+        """`count` other words, sampled by random index (expected O(count))"""
+        picked = []
+        seen = {word}
+        while len(picked) < count:
+            candidate = self.words[self._rng.randrange(len(self.words))]
+            if candidate not in seen:
+                seen.add(candidate)
+                picked.append(candidate)
+        return picked
+
+
+class QuestionBank:
+    """Word pools per category for the current dictionary version"""
+
+    def __init__(self):
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+        self.version = None
+        self.pools: Dict[str, WordPool] = {}
+        # Registered before the first build so no version published in between is missed
+        db.on_publish(self._rebuild)
+        self._rebuild(db.snapshot())
+
+    def _rebuild(self, snapshot: DictionarySnapshot):
+        """Build the pools of a dictionary version (skipped if a newer one is already built)"""
+        with self._lock:
+            if self.version is not None and snapshot.version <= self.version:
+                return
+            # Entries come from the category itself: a letter and a word may share a name
+            pools = {
+                category: WordPool(list(items.keys()), items, self._rng)
+                for category, items in snapshot.dictionary.items()
+            }
+            self.pools = pools
+            self.version = snapshot.version
+            logger.info(f"Question bank built for dictionary v{snapshot.version}: "
+                        + ', '.join(f"{category} {len(pool)}" for category, pool in pools.items()))
+
+    def draw(self, count: int, category: str = 'words', options: int = 4) -> List[Dict]:
+        """
+        Up to `count` questions, each {'word', 'info', 'options'} with the
+        answer shuffled among `options` choices. Returns [] if the category has
+        fewer than `options` words.
+        """
+        pool = self.pools.get(category)
+        if pool is None or len(pool) < options:
+            return []
+
+        questions = []
+        for word in pool.deal(min(count, len(pool))):
+            choices = [word] + pool.distractors(word, options - 1)
+            self._rng.shuffle(choices)
+            questions.append({'word': word, 'info': pool.infos.get(word), 'options': choices})
+        return questions
+
+
+# Singleton instance (loaded on first use or by services.start_services)
+question_bank = LazyService('question bank', QuestionBank)
@@ -0,0 +1,163 @@
+"""
+Registry of active game rooms and solo sessions
+Maps room ids to game state and room codes to room ids, so joining by code,
+looking a room up and tearing it down are all O(1). Codes are handed out
+from a pool of free codes and returned to it when the room closes, so two
+open rooms never share a code. Codes start at 4 digits; once more than
+CODE_MAX_UTILIZATION of a length is in use, new rooms get a digit more.
+Every activity pushes the room's new expiry time onto a heap, so finding
+abandoned rooms only looks at the ones that are actually due.
+"""
+import sys
+import time
+import heapq
+import random
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CODE_MIN_DIGITS = 4
+CODE_MAX_DIGITS = 6
+# Share of the codes of one length that may be in use before longer codes are issued
+CODE_MAX_UTILIZATION = 0.5
+
+
+def approx_size(obj) -> int:
+    """Rough deep size in bytes of a game state (dicts, lists, sets, strings)"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(key) + approx_size(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item) for item in obj)
+    return size
+
+
+class CodePool:
+    """Free codes of one length; allocation and release are O(1)"""
+
+    def __init__(self, digits: int, rng: random.Random):
+        self.digits = digits
+        self.size = 9 * 10 ** (digits - 1)
+        self._rng = rng
+        self._free: Optional[List[str]] = None  # built on first use
+
+    @property
+    def in_use(self) -> int:
+        return 0 if self._free is None else self.size - len(self._free)
+
+    def utilization(self) -> float:
+        return self.in_use / self.size
+
+    def allocate(self) -> Optional[str]:
+        if self._free is None:
+            self._free = [str(code) for code in range(10 ** (self.digits - 1), 10 ** self.digits)]
+        if not self._free:
+            return None
+        # Swap a random free code to the end and pop it
+        i = self._rng.randrange(len(self._free))
+        self._free[i], self._free[-1] = self._free[-1], self._free[i]
+        return self._free.pop()
+
+    def release(self, code: str):
+        self._free.append(code)
+
+
+class RoomRegistry:
+    """room_id -> game state, with a room code -> room_id index"""
+
+    def __init__(self, rng: random.Random = None):
+        rng = rng or random.SystemRandom()
+        self._rooms: Dict[str, Dict] = {}
+        self._codes: Dict[str, str] = {}  # room code -> room_id
+        self._expiry: List[Tuple[float, str]] = []  # heap of (expires_at, room_id); stale entries are skipped
+        self._pools = {digits: CodePool(digits, rng) for digits in range(CODE_MIN_DIGITS, CODE_MAX_DIGITS + 1)}
+
+    # Read access works like the plain dict it replaces
+
+    def __contains__(self, room_id: str) -> bool:
+        return room_id in self._rooms
+
+    def __getitem__(self, room_id: str) -> Dict:
+        return self._rooms[room_id]
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rooms)
+
+    def get(self, room_id: str, default=None) -> Optional[Dict]:
+        return self._rooms.get(room_id, default)
+
+    def items(self):
+        return self._rooms.items()
+
+    def allocate_code(self) -> str:
+        """A code no open room uses, from the shortest length that is not too busy"""
+        for pool in self._pools.values():
+            if pool.utilization() < CODE_MAX_UTILIZATION:
+                code = pool.allocate()
+                if code:
+                    return code
+        # Every length is busy: take any free code left
+        for pool in self._pools.values():
+            code = pool.allocate()
+            if code:
+                return code
+        raise RuntimeError('No free room codes')
+
+    def create(self, state: Dict) -> Tuple[str, str]:
+        """Register a joinable room under a fresh code; returns (room_id, room_code)"""
+        code = self.allocate_code()
+        room_id = f"room_{code}"
+        state.update(room_id=room_id, room_code=code)
+        self._rooms[room_id] = state
+        self._codes[code] = room_id
+        return room_id, code
+
+    def add(self, room_id: str, state: Dict):
+        """Register a session that cannot be joined by code (e.g. solo practice)"""
+        self._rooms[room_id] = state
+
+    def find_by_code(self, code: str) -> Optional[str]:
+        return self._codes.get(code.strip())
+
+    def remove(self, room_id: str) -> Optional[Dict]:
+        """Drop a room and return its code to the pool"""
+        state = self._rooms.pop(room_id, None)
+        if state is not None:
+            code = state.get('room_code')
+            if code and self._codes.get(code) == room_id:
+                del self._codes[code]
+                self._pools[len(code)].release(code)
+        return state
+
+    def touch(self, room_id: str, ttl: float, now: float = None):
+        """Record activity: the room expires `ttl` seconds from now unless touched again"""
+        state = self._rooms.get(room_id)
+        if state is None:
+            return
+        now = time.time() if now is None else now
+        state['last_activity'] = now
+        state['expires_at'] = now + ttl
+        heapq.heappush(self._expiry, (state['expires_at'], room_id))
+
+        # Every touch leaves an outdated entry behind; rebuild when they dominate
+        if len(self._expiry) > 2 * len(self._rooms) + 64:
+            self._expiry = [
+                (room['expires_at'], rid) for rid, room in self._rooms.items() if 'expires_at' in room
+            ]
+            heapq.heapify(self._expiry)
+
+    def pop_expired(self, now: float = None) -> List[Tuple[str, Dict]]:
+        """Remove and return (room_id, state) of every room past its expiry time"""
+        now = time.time() if now is None else now
+        expired = []
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, room_id = heapq.heappop(self._expiry)
+            state = self._rooms.get(room_id)
+            if state is not None and state.get('expires_at') == expires_at:
+                expired.append((room_id, self.remove(room_id)))
+        return expired
+
+    def code_stats(self) -> Dict[int, Dict]:
+        """{digits: {'in_use', 'size'}} per code length"""
+        return {digits: {'in_use': pool.in_use, 'size': pool.size} for digits, pool in self._pools.items()}
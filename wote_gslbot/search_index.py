@@ -0,0 +1,173 @@
+"""
+Word indexes for the GSL dictionary
+WordIndex is a flat map from a normalized word to its entries in every
+category, so exact lookups are one dict access. FuzzyIndex adds a
+SymSpell-style symmetric delete index: every word is stored under itself
+and each single-character deletion of it, so a misspelt query only looks
+up its own deletions instead of scanning the whole dictionary.
+PrefixIndex answers "words starting with ..." for inline autocomplete.
+"""
+import copy
+import difflib
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Deletions applied to the query. Together with the indexed single
+# deletions this finds words with up to two extra characters typed, one
+# character missing, or one substituted/transposed character
+MAX_QUERY_DELETES = 2
+
+# Same similarity floor the difflib scan used
+MIN_SIMILARITY = 0.4
+
+
+def normalize_word(text: str) -> str:
+    """Index key for a word: upper case, '_'/'-' as spaces, single spaces"""
+    return ' '.join(text.upper().replace('_', ' ').replace('-', ' ').split())
+
+
+def _deletes(word: str) -> Set[str]:
+    """All strings made by removing one character from `word` (none for single characters)"""
+    if len(word) < 2:
+        return set()
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class WordIndex:
+    """
+    Normalized word -> {category: (word, info)}
+    A key can hold several categories (e.g. a letter and a word both named 'A').
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Dict[str, Tuple[str, Dict]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize_word(text) in self.entries
+
+    def build(self, dictionary: Dict):
+        """Index every entry of a {category: {word: info}} dictionary"""
+        self.entries = {}
+        for category, items in dictionary.items():
+            for word, info in items.items():
+                self.add(word, category, info)
+
+    def copy(self) -> 'WordIndex':
+        """
+        An index that add() can change without affecting this one
+        Only the top-level maps are copied (pointers, no re-indexing); add()
+        replaces the per-key containers it touches instead of mutating them.
+        """
+        clone = copy.copy(self)
+        clone.entries = dict(self.entries)
+        return clone
+
+    def _key_added(self, key: str):
+        """Called when a key gets its first entry"""
+
+    def add(self, word: str, category: str, info: Dict):
+        """Index (or re-index) one entry"""
+        key = normalize_word(word)
+        entries = self.entries.get(key)
+        self.entries[key] = {**(entries or {}), category: (word, info)}
+        if not entries:
+            self._key_added(key)
+
+    def lookup(self, text: str) -> Dict[str, Tuple[str, Dict]]:
+        """All {category: (word, info)} entries for `text` (empty if unknown)"""
+        return self.entries.get(normalize_word(text), {})
+
+    def lookup_many(self, texts: Iterable[str]) -> Dict[str, Dict[str, Tuple[str, Dict]]]:
+        """lookup() for a batch of words, keyed by the words as given"""
+        return {text: self.lookup(text) for text in texts}
+
+
+class FuzzyIndex(WordIndex):
+    """WordIndex that also answers 'did you mean' queries"""
+
+    def __init__(self):
+        super().__init__()
+        self._deletes: Dict[str, Set[str]] = {}  # key or deletion -> keys
+
+    def build(self, dictionary: Dict):
+        self._deletes = {}
+        super().build(dictionary)
+
+    def copy(self) -> 'FuzzyIndex':
+        clone = super().copy()
+        clone._deletes = dict(self._deletes)
+        return clone
+
+    def _key_added(self, key: str):
+        # New sets rather than in-place adds: buckets may be shared with a copy
+        for deletion in _deletes(key) | {key}:
+            bucket = self._deletes.get(deletion)
+            self._deletes[deletion] = {key} if bucket is None else bucket | {key}
+
+    def _candidates(self, query: str) -> Set[str]:
+        keys = {query}
+        frontier = {query}
+        for _ in range(MAX_QUERY_DELETES):
+            frontier = {shorter for key in frontier for shorter in _deletes(key)}
+            keys |= frontier
+
+        candidates = set()
+        for key in keys:
+            candidates |= self._deletes.get(key, set())
+        return candidates
+
+    def suggest(self, query: str, max_results: int = 5) -> List[Dict]:
+        """
+        Closest words to `query`, best first
+        Returns [{'word', 'info', 'category'}] with one item per category entry
+        """
+        query = normalize_word(query)
+        if not query:
+            return []
+
+        scored: List[Tuple[float, str]] = []
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(query)
+        for key in self._candidates(query):
+            matcher.set_seq1(key)
+            score = matcher.ratio()
+            if score >= MIN_SIMILARITY:
+                scored.append((score, key))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        results = []
+        for _, key in scored[:max_results]:
+            for category, (word, info) in self.entries[key].items():
+                results.append({'word': word, 'info': info, 'category': category})
+        return results[:max_results]
+
+
+class PrefixIndex:
+    """Sorted keys; a prefix lookup is one binary search plus a slice, O(log N + limit)"""
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = sorted(keys)
+
+    def copy(self) -> 'PrefixIndex':
+        clone = copy.copy(self)
+        clone.keys = list(self.keys)
+        return clone
+
+    def add(self, key: str):
+        """Insert a new key in order (O(N) list insert, no re-sort)"""
+        insort(self.keys, key)
+
+    def complete(self, prefix: str, limit: int = 20) -> List[str]:
+        """Up to `limit` keys starting with the normalized `prefix`, alphabetically"""
+        prefix = normalize_word(prefix)
+        start = bisect_left(self.keys, prefix)
+        matches = []
+        for key in self.keys[start:start + limit]:
+            if not key.startswith(prefix):
+                break
+            matches.append(key)
+        return matches
@@ -0,0 +1,269 @@
+"""
+Outbound send scheduler for the GSL bot
+A python-telegram-bot rate limiter with a global token bucket, per-chat
+buckets, RetryAfter handling and priority lanes.
+"""
+import time
+import asyncio
+import logging
+import functools
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from config import SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_CHAT_BURST, SEND_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, lowest value is served first
+LANE_GAME = 0         # in-game questions, answers and results
+LANE_DEFAULT = 1      # everything else (menus, dictionary lookups)
+LANE_BULK = 2         # leaderboard, browsing, media pre-warm
+LANE_NAMES = {LANE_GAME: 'game', LANE_DEFAULT: 'default', LANE_BULK: 'bulk'}
+
+# Telegram allows ~20 messages per minute in a group
+GROUP_RATE = 20 / 60
+GROUP_BURST = 3
+
+_current_lane: ContextVar[int] = ContextVar('send_lane', default=LANE_DEFAULT)
+
+
+@contextmanager
+def send_lane(lane: int):
+    """Route every bot request made inside this block (and tasks it spawns) to `lane`"""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def in_lane(lane: int):
+    """Decorator: run an async handler inside send_lane(lane)"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with send_lane(lane):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until one token is available (0 if available now)"""
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, seconds: float):
+        """Refuse tokens for `seconds` (used after a RetryAfter)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        return self.delay(now) == 0 and self.tokens >= self.capacity
+
+
+class SendScheduler(BaseRateLimiter[Dict[str, Any]]):
+    """
+    Central scheduler for every request the bot makes
+    Requests with a chat_id wait for a global token and a token from their
+    chat's bucket; waiting requests are granted in lane order, FIFO within a lane.
+    The lane comes from rate_limit_args={'lane': ...} or the send_lane() context.
+    """
+
+    def __init__(self, global_rate: float = SEND_GLOBAL_RATE, chat_rate: float = SEND_CHAT_RATE,
+                 chat_burst: float = SEND_CHAT_BURST, max_retries: int = SEND_MAX_RETRIES):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._lanes: Dict[int, deque] = {lane: deque() for lane in LANE_NAMES}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.metrics = {
+            lane: {'sent': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for lane in LANE_NAMES
+        }
+        self.retry_after_count = 0
+
+    async def initialize(self):
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def shutdown(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+        for queue in self._lanes.values():
+            while queue:
+                _, future = queue.popleft()
+                future.cancel()
+
+    # ========================
+    # BUCKETS
+    # ========================
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 1024:
+                # Drop buckets that are full again - they hold no state worth keeping
+                now = time.monotonic()
+                for key, idle_bucket in list(self._chats.items()):
+                    if idle_bucket.is_idle(now):
+                        del self._chats[key]
+
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(GROUP_RATE, GROUP_BURST) if is_group else TokenBucket(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    # ========================
+    # QUEUE
+    # ========================
+
+    async def _acquire(self, lane: int, chat_id):
+        """Wait until the dispatcher grants this request a send slot"""
+        enqueued_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[lane].append((chat_id, future))
+        self._wakeup.set()
+
+        await future
+
+        waited = time.monotonic() - enqueued_at
+        metrics = self.metrics[lane]
+        metrics['sent'] += 1
+        metrics['total_wait'] += waited
+        metrics['max_wait'] = max(metrics['max_wait'], waited)
+
+    def _grant_next(self, now: float) -> float:
+        """Grant the highest-priority ready request; returns seconds to sleep if none was ready"""
+        global_delay = self._global.delay(now)
+        if global_delay > 0:
+            return global_delay
+
+        next_ready = None
+        for lane in sorted(self._lanes):
+            queue = self._lanes[lane]
+            for idx, (chat_id, future) in enumerate(queue):
+                if future.done():
+                    # Caller was cancelled while waiting
+                    del queue[idx]
+                    return 0.0
+
+                chat_delay = self._chat_bucket(chat_id).delay(now)
+                if chat_delay <= 0:
+                    del queue[idx]
+                    self._global.consume(now)
+                    self._chats[chat_id].consume(now)
+                    future.set_result(None)
+                    return 0.0
+
+                next_ready = chat_delay if next_ready is None else min(next_ready, chat_delay)
+
+        return next_ready
+
+    async def _dispatch(self):
+        while True:
+            delay = self._grant_next(time.monotonic()) if self.queue_depth() else None
+            if delay == 0:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    # ========================
+    # RATE LIMITER API
+    # ========================
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        lane = (rate_limit_args or {}).get('lane', _current_lane.get())
+        chat_id = data.get('chat_id')
+        if isinstance(chat_id, str):
+            try:
+                chat_id = int(chat_id)
+            except ValueError:
+                pass  # @channelusername
+
+        for attempt in range(self.max_retries + 1):
+            if chat_id is not None and self._dispatcher is not None:
+                await self._acquire(lane, chat_id)
+            else:
+                # getUpdates, answerCallbackQuery etc. only honour a global pause
+                pause = self._global.blocked_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                retry_after += 0.1
+
+                self.retry_after_count += 1
+                bucket = self._chat_bucket(chat_id) if chat_id is not None else self._global
+                bucket.block(retry_after)
+                logger.warning(f"RetryAfter on {endpoint} (chat {chat_id}): waiting {retry_after:.1f}s, attempt {attempt + 1}")
+
+                if attempt >= self.max_retries:
+                    raise
+
+    # ========================
+    # METRICS
+    # ========================
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._lanes.values())
+
+    def get_metrics(self) -> Dict:
+        """Queue depth and wait times per lane"""
+        return {
+            'retry_after': self.retry_after_count,
+            'active_chats': len(self._chats),
+            'lanes': {
+                LANE_NAMES[lane]: {
+                    'queued': len(self._lanes[lane]),
+                    'sent': m['sent'],
+                    'avg_wait': m['total_wait'] / m['sent'] if m['sent'] else 0.0,
+                    'max_wait': m['max_wait']
+                }
+                for lane, m in self.metrics.items()
+            }
+        }
+
+
+# Singleton instance
+send_scheduler = SendScheduler()
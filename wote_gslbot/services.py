@@ -0,0 +1,89 @@
+"""
+Lazily initialized singletons and the bot's startup phase
+Importing a module no longer loads its data: `db`, `game_db`, `media_cache`,
+`media_manifest` and `question_bank` are LazyService proxies that build the
+real object on first use. start_services() builds them all in parallel
+threads so the bot can finish connecting to Telegram while the indexes load.
+"""
+import time
+import logging
+import threading
+from typing import Callable, Dict, List
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_services: List['LazyService'] = []
+
+
+class LazyService:
+    """Stands in for a singleton; the first attribute access creates it (thread-safe)"""
+
+    def __init__(self, name: str, factory: Callable):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, 'init_time', None)
+        _services.append(self)
+
+    def get(self):
+        """The real instance, created on first call"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    started = time.perf_counter()
+                    instance = self._factory()
+                    object.__setattr__(self, 'init_time', time.perf_counter() - started)
+                    object.__setattr__(self, '_instance', instance)
+                    logger.info(f"Loaded {self._name} in {self.init_time * 1000:.0f} ms")
+        return instance
+
+    def is_loaded(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.get(), attr, value)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.is_loaded() else 'not loaded'
+        return f"<LazyService {self._name} ({state})>"
+
+
+def _load_all() -> Dict[str, float]:
+    # Importing registers the module's LazyService
+    import media_manifest, media_cache, database, game_database, question_bank  # noqa: F401
+    from config import ensure_directories
+
+    started = time.perf_counter()
+    ensure_directories()
+    with ThreadPoolExecutor(max_workers=len(_services), thread_name_prefix='startup') as pool:
+        for future in [pool.submit(service.get) for service in _services]:
+            future.result()
+
+    timings = {service._name: service.init_time for service in _services}
+    logger.info(f"Startup finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return timings
+
+
+def start_services() -> Future:
+    """
+    Begin loading every service in the background
+    Returns a Future with {service name: seconds}; await it (asyncio.wrap_future)
+    before handling updates. Services not loaded yet still load on first use.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(_load_all())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name='startup', daemon=True).start()
+    return future
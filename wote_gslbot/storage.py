@@ -0,0 +1,339 @@
+"""
+Storage backends for the GSL dictionary and game data
+STORAGE_BACKEND='json' keeps the original whole-file JSON documents;
+'sqlite' keeps one row per sign and user in SQLITE_FILE (WAL mode), so a
+write touches a row instead of rewriting a file. Finished games go to the
+game_history log with either backend.
+Use migrate_storage.py to copy existing JSON data into SQLite.
+"""
+import copy
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import (
+    STORAGE_BACKEND, SQLITE_FILE, DICTIONARY_FILE, GAME_DATA_FLUSH_INTERVAL, GAME_DATA_FLUSH_MAX_PENDING
+)
+from json_store import WriteBehindJson, write_json_atomic
+
+# Players listed by get_leaderboard and stored in game_data.json; rank and
+# percentile come from leaderboard.Leaderboard and cover every player
+LEADERBOARD_SIZE = 50
+
+USER_COLUMNS = (
+    'user_id', 'username', 'first_name', 'total_games', 'wins', 'total_points',
+    'cultural_mastery', 'streak', 'achievements', 'created_at', 'last_played'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signs (
+    category TEXT NOT NULL,
+    word TEXT NOT NULL,
+    info TEXT NOT NULL,
+    PRIMARY KEY (category, word)
+);
+CREATE INDEX IF NOT EXISTS idx_signs_word ON signs (word);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    first_name TEXT,
+    total_games INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    total_points INTEGER NOT NULL DEFAULT 0,
+    cultural_mastery INTEGER NOT NULL DEFAULT 0,
+    streak INTEGER NOT NULL DEFAULT 0,
+    achievements TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT,
+    last_played TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_points ON users (total_points DESC);
+"""
+
+
+def leaderboard_entry(user: Dict) -> Dict:
+    """The public fields of a user shown on the leaderboard"""
+    return {
+        'user_id': user['user_id'],
+        'username': user.get('username', 'Anonymous'),
+        'first_name': user.get('first_name', 'User'),
+        'total_points': user['total_points'],
+        'wins': user['wins'],
+        'total_games': user['total_games']
+    }
+
+
+class SqliteConnection:
+    """One shared connection (WAL, thread-safe via a lock) per database file"""
+
+    _connections: Dict[str, 'SqliteConnection'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.RLock()
+
+    @classmethod
+    def open(cls, path: Path) -> 'SqliteConnection':
+        with cls._registry_lock:
+            key = str(Path(path).resolve())
+            if key not in cls._connections:
+                cls._connections[key] = cls(Path(path))
+            return cls._connections[key]
+
+    def execute(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def transaction(self, statements: List[Tuple[str, tuple]]):
+        """Run (sql, params) statements atomically"""
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                for sql, params in statements:
+                    self.conn.execute(sql, params)
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+
+
+# ========================
+# DICTIONARY
+# ========================
+
+class JsonDictionaryStore:
+    """The dictionary as one JSON document (rewritten atomically on save)"""
+
+    def __init__(self, path: Path = DICTIONARY_FILE):
+        self.path = path
+        self._mtime_ns = self._stat_mtime()  # of the file as last loaded or saved here
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def modified_elsewhere(self) -> bool:
+        """Whether another process (e.g. transcode.py) rewrote the file since we last read or wrote it"""
+        return self._stat_mtime() != self._mtime_ns
+
+    def load(self) -> Dict:
+        self._mtime_ns = self._stat_mtime()
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def save(self, dictionary: Dict, previous: Optional[Dict] = None):
+        write_json_atomic(self.path, dictionary)
+        self._mtime_ns = self._stat_mtime()
+
+    def save_entries(self, dictionary: Dict, changed: List[Tuple[str, str]]):
+        """Store added/replaced (category, word) entries; a JSON document is rewritten whole"""
+        self.save(dictionary)
+
+
+class SqliteDictionaryStore:
+    """The dictionary as one row per (category, word); saves only write changed rows"""
+
+    def __init__(self, path: Path = SQLITE_FILE):
+        self.db = SqliteConnection.open(path)
+        self._data_version = self._current_data_version()  # as last loaded or saved here
+
+    def exists(self) -> bool:
+        return bool(self.db.execute('SELECT 1 FROM signs LIMIT 1'))
+
+    def _current_data_version(self) -> int:
+        # Only changes when another connection commits
+        return self.db.execute('PRAGMA data_version')[0][0]
+
+    def modified_elsewhere(self) -> bool:
+        """Whether another process (e.g. transcode.py) committed changes since we last read or wrote"""
+        return self._current_data_version() != self._data_version
+
+    def load(self) -> Dict:
+        self._data_version = self._current_data_version()
+        dictionary = {}
+        for row in self.db.execute('SELECT category, word, info FROM signs ORDER BY rowid'):
+            dictionary.setdefault(row['category'], {})[row['word']] = json.loads(row['info'])
+        return dictionary
+
+    def save(self, dictionary: Dict, previous: Optional[Dict] = None):
+        """Upsert entries that differ from `previous` (default: what is stored) and delete removed ones"""
+        if previous is None:
+            previous = self.load()
+
+        statements = []
+        for category, items in dictionary.items():
+            old_items = previous.get(category, {})
+            for word, info in items.items():
+                if old_items.get(word) != info:
+                    statements.append((
+                        'INSERT OR REPLACE INTO signs (category, word, info) VALUES (?, ?, ?)',
+                        (category, word, json.dumps(info, ensure_ascii=False))
+                    ))
+        for category, old_items in previous.items():
+            items = dictionary.get(category, {})
+            for word in old_items.keys() - items.keys():
+                statements.append(('DELETE FROM signs WHERE category = ? AND word = ?', (category, word)))
+
+        if statements:
+            self.db.transaction(statements)
+        self._data_version = self._current_data_version()
+
+    def save_entries(self, dictionary: Dict, changed: List[Tuple[str, str]]):
+        """Upsert only the added/replaced (category, word) entries"""
+        self.db.transaction([
+            ('INSERT OR REPLACE INTO signs (category, word, info) VALUES (?, ?, ?)',
+             (category, word, json.dumps(dictionary[category][word], ensure_ascii=False)))
+            for category, word in changed
+        ])
+        self._data_version = self._current_data_version()
+
+    def clear(self):
+        """Delete every sign (migrate_storage.py --force)"""
+        self.db.execute('DELETE FROM signs')
+
+
+# ========================
+# GAME DATA
+# ========================
+
+class JsonGameStore:
+    """
+    Users and the top of the leaderboard as one JSON document
+    Changes are written behind: the file is rewritten at most once per
+    GAME_DATA_FLUSH_INTERVAL (or after GAME_DATA_FLUSH_MAX_PENDING changes),
+    never on the request path. Call flush() before exiting.
+    The flush thread serializes the document, so it is only changed under
+    `lock`: get_user() hands out a copy and put_user() swaps it in.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.game_data = self._load()
+        self.lock = threading.RLock()
+        self.writer = WriteBehindJson(
+            path, lambda: self.game_data, GAME_DATA_FLUSH_INTERVAL, GAME_DATA_FLUSH_MAX_PENDING, self.lock
+        )
+
+    def _load(self) -> Dict:
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {
+            'users': {},  # user_id -> user_stats
+            'leaderboard': []
+        }
+
+    def flush(self) -> bool:
+        """Write pending changes now"""
+        return self.writer.flush()
+
+    def get_user(self, user_id: int) -> Optional[Dict]:
+        """A copy of the user; changes are stored with put_user()"""
+        with self.lock:
+            user = self.game_data['users'].get(str(user_id))
+            return copy.deepcopy(user) if user is not None else None
+
+    def put_user(self, user: Dict):
+        user = copy.deepcopy(user)  # the caller may keep changing its dict
+        with self.lock:
+            self.game_data['users'][str(user['user_id'])] = user
+        self.writer.mark_dirty()
+
+    def iter_scores(self) -> Iterable[Tuple[int, int]]:
+        """(user_id, total_points) of every user"""
+        with self.lock:
+            return [(user['user_id'], user['total_points']) for user in self.game_data['users'].values()]
+
+    def save_leaderboard(self, entries: List[Dict]):
+        """Keep the top players in the document for readers of game_data.json"""
+        with self.lock:
+            self.game_data['leaderboard'] = entries
+        self.writer.mark_dirty()
+
+    def legacy_history(self) -> List[Dict]:
+        """Games recorded in the document before they moved to the game history log"""
+        with self.lock:
+            return list(self.game_data.get('game_history', []))
+
+    def drop_legacy_history(self):
+        with self.lock:
+            self.game_data.pop('game_history', None)
+        self.writer.mark_dirty()
+
+
+class SqliteGameStore:
+    """Users as rows, indexed by user_id and total_points"""
+
+    def __init__(self, path: Path = SQLITE_FILE):
+        self.db = SqliteConnection.open(path)
+
+    def flush(self) -> bool:
+        """Nothing to do: every write is committed as it happens"""
+        return False
+
+    def _user_from_row(self, row: sqlite3.Row) -> Dict:
+        user = dict(row)
+        user['achievements'] = json.loads(user['achievements'])
+        return user
+
+    def get_user(self, user_id: int) -> Optional[Dict]:
+        rows = self.db.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
+        return self._user_from_row(rows[0]) if rows else None
+
+    def put_user(self, user: Dict):
+        self.put_users([user])
+
+    def put_users(self, users: List[Dict]):
+        """Insert or replace users in one transaction"""
+        sql = (f"INSERT OR REPLACE INTO users ({', '.join(USER_COLUMNS)}) "
+               f"VALUES ({', '.join('?' * len(USER_COLUMNS))})")
+        statements = []
+        for user in users:
+            values = [user.get(column) for column in USER_COLUMNS]
+            values[USER_COLUMNS.index('achievements')] = json.dumps(user.get('achievements', []))
+            statements.append((sql, tuple(values)))
+        self.db.transaction(statements)
+
+    def count_users(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM users')[0][0]
+
+    def iter_scores(self) -> Iterable[Tuple[int, int]]:
+        """(user_id, total_points) of every user"""
+        return [tuple(row) for row in self.db.execute('SELECT user_id, total_points FROM users')]
+
+    def save_leaderboard(self, entries: List[Dict]):
+        """Nothing to do: the leaderboard is derived from the users table"""
+
+    def legacy_history(self) -> List[Dict]:
+        return []
+
+    def drop_legacy_history(self):
+        """Nothing to do: games were never stored in the database"""
+
+    def clear(self):
+        """Delete every user (migrate_storage.py --force)"""
+        self.db.execute('DELETE FROM users')
+
+
+def open_dictionary_store():
+    """Dictionary store for the configured STORAGE_BACKEND"""
+    return SqliteDictionaryStore() if STORAGE_BACKEND == 'sqlite' else JsonDictionaryStore()
+
+
+def open_game_store(json_path: Path):
+    """Game data store for the configured STORAGE_BACKEND (`json_path` for the JSON backend)"""
+    return SqliteGameStore() if STORAGE_BACKEND == 'sqlite' else JsonGameStore(json_path)
@@ -0,0 +1,192 @@
+"""
+Offline transcoder for GSL sign videos
+Produces a compact 'small' variant and a short 'preview' variant of every
+video in CATEGORIES and records them on the dictionary entries. Variants
+are keyed by content hash (see media_manifest.py).
+
+Usage: python transcode.py [--workers N] [--force]
+"""
+import os
+import shutil
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import (
+    CATEGORIES, SUPPORTED_VIDEO_FORMATS, TRANSCODED_DIR, FFMPEG_BIN, MEDIA_SIZE_BUDGET
+)
+from media_manifest import media_manifest, _probe_video
+
+# Variant name -> ffmpeg output arguments (sign videos carry no useful audio)
+VARIANTS = {
+    'small': [
+        '-vf', "scale='min(480,iw)':-2",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '30',
+        '-an', '-movflags', '+faststart'
+    ],
+    'preview': [
+        '-t', '3',
+        '-vf', "scale='min(240,iw)':-2,fps=12",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '34',
+        '-an', '-movflags', '+faststart'
+    ]
+}
+
+# Seconds one ffmpeg run may take before the blob is counted as failed
+TRANSCODE_TIMEOUT = 600
+
+
+def variant_path(sha256: str, variant: str) -> Path:
+    """Where a transcoded variant of a blob is stored (content addressed)"""
+    return TRANSCODED_DIR / sha256[:2] / f"{sha256}.{variant}.mp4"
+
+
+def _existing_variants(outputs: Dict[str, Path]) -> Dict:
+    """Variant records (path, size and probed duration/dimensions) stored on a dictionary entry"""
+    return {
+        name: {'path': str(path), 'size': path.stat().st_size, **_probe_video(path)}
+        for name, path in outputs.items()
+    }
+
+
+def _transcode_blob(source: str, sha256: str, force: bool) -> Tuple[bool, Dict]:
+    """
+    Worker: transcode one video blob into all VARIANTS
+    Outputs are named after the content hash, so unchanged files are never
+    re-encoded. Returns (transcoded, variants)
+    """
+    outputs = {name: variant_path(sha256, name) for name in VARIANTS}
+    if not force and all(path.exists() for path in outputs.values()):
+        return False, _existing_variants(outputs)
+
+    for name, args in VARIANTS.items():
+        output = outputs[name]
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp_output = output.with_name(output.stem + '.tmp.mp4')
+        subprocess.run(
+            [FFMPEG_BIN, '-y', '-loglevel', 'error', '-i', source, *args, str(tmp_output)],
+            check=True, timeout=TRANSCODE_TIMEOUT
+        )
+        os.replace(tmp_output, output)
+
+    return True, _existing_variants(outputs)
+
+
+def transcode_all(dictionary: Dict, workers: int = None, force: bool = False) -> Dict:
+    """
+    Transcode every video blob in `dictionary` in a process pool
+    The media manifest is refreshed first (only changed files are re-hashed);
+    identical files are transcoded once and every entry pointing at the blob
+    gets the variants.
+    """
+    media_manifest.build(dictionary)
+
+    jobs = {}  # sha256 -> [entries]
+    for category in CATEGORIES:
+        for word, info in dictionary.get(category, {}).items():
+            sha256 = info.get('blob')
+            if not sha256 or Path(info['path']).suffix.lower() not in SUPPORTED_VIDEO_FORMATS:
+                continue
+            jobs.setdefault(sha256, []).append(info)
+
+    stats = {'videos': len(jobs), 'transcoded': 0, 'unchanged': 0, 'failed': 0}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_transcode_blob, media_manifest.get_blob(sha256)['path'], sha256, force): sha256
+            for sha256 in jobs
+        }
+        for future in as_completed(futures):
+            sha256 = futures[future]
+            source = media_manifest.get_blob(sha256)['path']
+            try:
+                transcoded, variants = future.result()
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"   ❌ {source}: {e}")
+                continue
+
+            if transcoded:
+                stats['transcoded'] += 1
+                print(f"   ✅ {Path(source).name}: " + ', '.join(
+                    f"{name} {v['size'] / 1024:.0f} KB" for name, v in variants.items()
+                ))
+            else:
+                stats['unchanged'] += 1
+
+            for info in jobs[sha256]:
+                info['variants'] = variants
+
+    return stats
+
+
+def select_media_path(info: Dict, budget: int = MEDIA_SIZE_BUDGET) -> Path:
+    """
+    Pick the file to send for a dictionary entry: the original if it fits the
+    size budget, otherwise the largest variant under budget, otherwise the smallest
+    """
+    original = Path(info['path'])
+    variants = [
+        (v['size'], Path(v['path']))
+        for name, v in info.get('variants', {}).items()
+        if name != 'preview' and Path(v['path']).exists()
+    ]
+    if not variants:
+        return original
+
+    if original.exists():
+        variants.append((original.stat().st_size, original))
+
+    fitting = [candidate for candidate in variants if candidate[0] <= budget]
+    if fitting:
+        return max(fitting)[1]
+    return min(variants)[1]
+
+
+def video_send_options(info: Dict, media_path: Path) -> Dict:
+    """
+    send_video keyword arguments for the file chosen by select_media_path:
+    duration/width/height of that file, the entry's thumbnail, and
+    supports_streaming so clients can start playback before the download ends
+    """
+    metadata = info
+    for variant in info.get('variants', {}).values():
+        if variant['path'] == str(media_path):
+            metadata = variant
+            break
+
+    options = {'supports_streaming': True}
+    if metadata.get('duration'):
+        options['duration'] = max(1, round(metadata['duration']))
+    if metadata.get('width') and metadata.get('height'):
+        options['width'] = metadata['width']
+        options['height'] = metadata['height']
+    if info.get('thumbnail'):
+        options['thumbnail'] = Path(info['thumbnail'])
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Transcode GSL sign videos into compact variants')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Re-transcode even already transcoded blobs')
+    args = parser.parse_args()
+
+    if not shutil.which(FFMPEG_BIN):
+        print(f"❌ ffmpeg not found ({FFMPEG_BIN}). Install it or set FFMPEG_BIN.")
+        exit(1)
+
+    # Imported here so pool workers don't rescan the dictionary on spawn
+    from database import db
+
+    print("🎬 Transcoding sign videos...")
+    stats = db.update(lambda dictionary: transcode_all(dictionary, workers=args.workers, force=args.force))
+
+    print(f"\n📊 {stats['videos']} videos: {stats['transcoded']} transcoded, "
+          f"{stats['unchanged']} unchanged, {stats['failed']} failed")
+    print("💡 A running bot picks up the variants on its next media scan (or right away with /reload)")
+
+
+if __name__ == '__main__':
+    main()